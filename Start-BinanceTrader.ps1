@@ -31,10 +31,18 @@ Write-Host "Checking prerequisites..." -ForegroundColor Yellow
 try {
     $pythonVersion = python --version 2>&1
     Write-Host "✓ Python: $pythonVersion" -ForegroundColor Green
+    # asyncio.to_thread and numpy 1.26 need Python 3.9 or newer
+    python -c "import sys; sys.exit(sys.version_info < (3, 9))"
+    if ($LASTEXITCODE -ne 0) {
+        Write-Host "✗ Python 3.9 or newer is required" -ForegroundColor Red
+        Write-Host "Please install Python 3.9+ from https://python.org" -ForegroundColor Yellow
+        Read-Host "Press Enter to exit"
+        exit 1
+    }
 }
 catch {
     Write-Host "✗ Python is not installed or not in PATH" -ForegroundColor Red
-    Write-Host "Please install Python 3.8+ from https://python.org" -ForegroundColor Yellow
+    Write-Host "Please install Python 3.9+ from https://python.org" -ForegroundColor Yellow
     Read-Host "Press Enter to exit"
     exit 1
 }
@@ -0,0 +1,281 @@
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from column_table import ColumnTable
+
+# Per-account trading parameters kept as columns, same meaning as TradeSettings
+SETTING_FIELDS = ("trade_amount", "take_profit", "stop_loss", "activation_distance")
+SETTING_DEFAULTS = {"trade_amount": 500.0, "take_profit": 10.0, "stop_loss": 3.0, "activation_distance": 1.5}
+DEFAULT_TIMEFRAME = "5m"
+
+# History row kinds
+FILL_OPEN = 0
+FILL_TAKE_PROFIT = 1
+FILL_STOP_LOSS = 2
+FILL_MANUAL_CLOSE = 3
+FILL_NAMES = ("filled", "take_profit", "stop_loss", "closed")
+SIDES = ("BUY", "SELL")
+
+
+class AccountBook:
+    """Isolated paper-trading accounts stored in array-backed tables.
+
+    Each account has its own settings, open positions and fill history,
+    but nothing is stored per account as a Python object beyond one dict
+    entry mapping its id to a row. Take-profit / stop-loss checks and PnL
+    for every open position of every account run as one vectorized pass
+    per price tick.
+
+    Fills of one account are chained newest-first through the ``prev``
+    history column, so reading an account's history costs O(limit). Only
+    the newest ``max_history`` fills across all accounts are kept.
+    """
+
+    def __init__(self, symbols: List[str], capacity: int = 1024, max_history: int = 1_000_000):
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.index: Dict[str, int] = {}
+        self.account_ids: List[str] = []
+        self.timeframes: List[str] = []
+        self.accounts = ColumnTable({
+            **{field: "f8" for field in SETTING_FIELDS}, "realized_pnl": "f8", "last_fill": "i8",
+        }, capacity)
+        self.positions = ColumnTable({
+            "position_id": "i8", "account": "i4", "symbol": "i4", "side": "i1",
+            "entry_price": "f8", "quantity": "f8", "take_profit_price": "f8",
+            "stop_loss_price": "f8", "opened_at": "f8", "open": "?",
+        }, capacity)
+        self.history = ColumnTable({
+            "account": "i4", "symbol": "i4", "side": "i1", "kind": "i1",
+            "price": "f8", "quantity": "f8", "pnl": "f8", "timestamp": "f8", "prev": "i8",
+        }, capacity)
+        self.max_history = max_history
+        self.next_position_id = 1
+        self.prices = np.full(len(self.symbols), np.nan)
+
+    # Accounts
+
+    def create_account(self, account_id: Optional[str] = None, settings: Optional[dict] = None) -> str:
+        account_id = account_id or str(uuid.uuid4())
+        if account_id in self.index:
+            raise ValueError(f"Account {account_id} already exists")
+        row = self.accounts.append(realized_pnl=0.0, last_fill=-1, **SETTING_DEFAULTS)
+        self.index[account_id] = row
+        self.account_ids.append(account_id)
+        self.timeframes.append(DEFAULT_TIMEFRAME)
+        if settings:
+            self.update_settings(account_id, settings)
+        return account_id
+
+    def _row(self, account_id: str) -> int:
+        row = self.index.get(account_id)
+        if row is None:
+            raise KeyError(account_id)
+        return row
+
+    def get_settings(self, account_id: str) -> dict:
+        row = self._row(account_id)
+        settings = {field: float(self.accounts[field][row]) for field in SETTING_FIELDS}
+        settings["timeframe"] = self.timeframes[row]
+        return settings
+
+    def update_settings(self, account_id: str, settings: dict) -> dict:
+        row = self._row(account_id)
+        for field in SETTING_FIELDS:
+            if settings.get(field) is not None:
+                self.accounts.columns[field][row] = float(settings[field])
+        if settings.get("timeframe"):
+            self.timeframes[row] = settings["timeframe"]
+        return self.get_settings(account_id)
+
+    # Trading
+
+    def open_position(self, account_id: str, symbol: str, side: str, price: float,
+                      timestamp: Optional[float] = None) -> dict:
+        row = self._row(account_id)
+        symbol_idx = self.symbol_index[symbol]
+        if side.upper() not in SIDES:
+            raise ValueError(f"side must be BUY or SELL, got {side!r}")
+        direction = 1 if side.upper() == "BUY" else -1
+        amount = float(self.accounts["trade_amount"][row])
+        take_profit = float(self.accounts["take_profit"][row])
+        stop_loss = float(self.accounts["stop_loss"][row])
+        timestamp = time.time() if timestamp is None else timestamp
+        quantity = amount / price
+
+        position_id = self.next_position_id
+        self.next_position_id += 1
+        self.positions.append(
+            position_id=position_id, account=row, symbol=symbol_idx, side=direction,
+            entry_price=price, quantity=quantity,
+            take_profit_price=price * (1 + direction * take_profit / 100),
+            stop_loss_price=price * (1 - direction * stop_loss / 100),
+            opened_at=timestamp, open=True
+        )
+        self._record_fills(np.array([row]), symbol=symbol_idx, side=direction, kind=FILL_OPEN,
+                           price=price, quantity=quantity, pnl=0.0, timestamp=timestamp)
+        return {
+            "position_id": position_id,
+            "account_id": account_id,
+            "pair": symbol,
+            "side": "BUY" if direction > 0 else "SELL",
+            "amount": amount,
+            "quantity": quantity,
+            "price": price,
+            "take_profit_price": price * (1 + direction * take_profit / 100),
+            "stop_loss_price": price * (1 - direction * stop_loss / 100),
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            "status": "filled"
+        }
+
+    def _close(self, rows: np.ndarray, exit_prices: np.ndarray, kinds, timestamp: float) -> None:
+        positions = self.positions
+        side = positions["side"][rows]
+        quantity = positions["quantity"][rows]
+        accounts = positions["account"][rows]
+        pnl = side * (exit_prices - positions["entry_price"][rows]) * quantity
+        np.add.at(self.accounts.columns["realized_pnl"], accounts, pnl)
+        self._record_fills(accounts, symbol=positions["symbol"][rows], side=-side,
+                           kind=kinds, price=exit_prices, quantity=quantity, pnl=pnl, timestamp=timestamp)
+        positions.columns["open"][rows] = False
+
+    def _record_fills(self, accounts: np.ndarray, **values) -> None:
+        """Append fills and link each onto its account's newest-first chain"""
+        history = self.history
+        start = history.size
+        history.extend(len(accounts), account=accounts, **values)
+        new_rows = np.arange(start, history.size)
+        # Group the batch by account; within a group each fill points at the
+        # previous one, and the group's first at the account's old newest fill
+        order = np.argsort(accounts, kind="stable")
+        grouped = accounts[order]
+        rows = new_rows[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = grouped[1:] != grouped[:-1]
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = first[1:]
+        last_fill = self.accounts.columns["last_fill"]
+        prev = np.empty(len(rows), dtype=np.int64)
+        prev[1:] = rows[:-1]
+        prev[first] = last_fill[grouped[first]]
+        history.columns["prev"][rows] = prev
+        last_fill[grouped[last]] = rows[last]
+
+        if history.size > self.max_history + self.max_history // 4:
+            self._trim_history()
+
+    def _trim_history(self) -> None:
+        """Drop the oldest fills down to ``max_history`` and re-base the links"""
+        history = self.history
+        dropped = history.size - self.max_history
+        history.keep(np.arange(history.size) >= dropped)
+        for column in (history.columns["prev"][:history.size], self.accounts["last_fill"]):
+            column -= dropped
+            column[column < 0] = -1
+
+    def close_all(self, account_id: str, timestamp: Optional[float] = None) -> int:
+        row = self._row(account_id)
+        positions = self.positions
+        rows = np.flatnonzero(positions["open"] & (positions["account"] == row))
+        exit_prices = self.prices[positions["symbol"][rows]]
+        priced = np.isfinite(exit_prices)
+        rows = rows[priced]
+        if len(rows):
+            self._close(rows, exit_prices[priced], FILL_MANUAL_CLOSE,
+                        time.time() if timestamp is None else timestamp)
+            self._compact()
+        return len(rows)
+
+    def on_tick(self, prices: Dict[str, float], timestamp: Optional[float] = None) -> int:
+        """Apply new prices; closes every position whose TP or SL was hit"""
+        for symbol, price in prices.items():
+            i = self.symbol_index.get(symbol)
+            if i is not None and price and price > 0:
+                self.prices[i] = price
+
+        positions = self.positions
+        if not positions.size:
+            return 0
+        price = self.prices[positions["symbol"]]
+        side = positions["side"]
+        live = positions["open"] & np.isfinite(price)
+        hit_take_profit = live & (side * (price - positions["take_profit_price"]) >= 0)
+        hit_stop_loss = live & ~hit_take_profit & (side * (price - positions["stop_loss_price"]) <= 0)
+        rows = np.flatnonzero(hit_take_profit | hit_stop_loss)
+        if len(rows):
+            kinds = np.where(hit_take_profit[rows], FILL_TAKE_PROFIT, FILL_STOP_LOSS)
+            self._close(rows, price[rows], kinds, time.time() if timestamp is None else timestamp)
+            self._compact()
+        return len(rows)
+
+    def _compact(self) -> None:
+        open_rows = self.positions["open"]
+        if self.positions.size > 1024 and open_rows.sum() < self.positions.size // 2:
+            self.positions.keep(open_rows.copy())
+
+    # Reporting
+
+    def unrealized_pnl(self) -> np.ndarray:
+        """Mark-to-market PnL of open positions for every account at once"""
+        positions = self.positions
+        price = self.prices[positions["symbol"]]
+        live = positions["open"] & np.isfinite(price)
+        pnl = positions["side"][live] * (price[live] - positions["entry_price"][live]) * positions["quantity"][live]
+        return np.bincount(positions["account"][live], weights=pnl, minlength=self.accounts.size)
+
+    def summary(self, account_id: str) -> dict:
+        row = self._row(account_id)
+        positions = self.positions
+        rows = np.flatnonzero(positions["open"] & (positions["account"] == row))
+        open_positions = []
+        unrealized = 0.0
+        for r in rows:
+            price = self.prices[positions["symbol"][r]]
+            pnl = float(positions["side"][r] * (price - positions["entry_price"][r]) * positions["quantity"][r]) if np.isfinite(price) else 0.0
+            unrealized += pnl
+            open_positions.append({
+                "position_id": int(positions["position_id"][r]),
+                "pair": self.symbols[positions["symbol"][r]],
+                "side": "BUY" if positions["side"][r] > 0 else "SELL",
+                "entry_price": float(positions["entry_price"][r]),
+                "quantity": float(positions["quantity"][r]),
+                "take_profit_price": float(positions["take_profit_price"][r]),
+                "stop_loss_price": float(positions["stop_loss_price"][r]),
+                "unrealized_pnl": pnl,
+            })
+        return {
+            "account_id": account_id,
+            "settings": self.get_settings(account_id),
+            "realized_pnl": float(self.accounts["realized_pnl"][row]),
+            "unrealized_pnl": unrealized,
+            "positions": open_positions,
+        }
+
+    def trade_history(self, account_id: str, limit: int = 100) -> List[dict]:
+        """Newest ``limit`` fills of one account, newest first"""
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        history = self.history
+        prev = history.columns["prev"]
+        rows = []
+        r = int(self.accounts["last_fill"][self._row(account_id)])
+        while r >= 0 and len(rows) < limit:
+            rows.append(r)
+            r = int(prev[r])
+        return [{
+            "pair": self.symbols[history["symbol"][r]],
+            "side": "BUY" if history["side"][r] > 0 else "SELL",
+            "status": FILL_NAMES[history["kind"][r]],
+            "price": float(history["price"][r]),
+            "quantity": float(history["quantity"][r]),
+            "pnl": float(history["pnl"][r]),
+            "timestamp": datetime.fromtimestamp(history["timestamp"][r]).isoformat(),
+        } for r in rows]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the tables"""
+        return self.accounts.nbytes() + self.positions.nbytes() + self.history.nbytes()
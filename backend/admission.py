@@ -0,0 +1,118 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets with a bounded, LRU-evicted client table"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client key -> [tokens, last refill time]
+        self.buckets = OrderedDict()
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token for ``key``; returns 0 on success or seconds to wait"""
+        now = time.monotonic() if now is None else now
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_clients:
+                self.buckets.popitem(last=False)
+            bucket = [self.burst, now]
+            self.buckets[key] = bucket
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+
+class RouteClass:
+    """A group of routes sharing a per-client rate limit and a concurrency cap"""
+
+    def __init__(self, name: str, routes: List[Tuple[str, str]], rate: float, burst: float,
+                 max_concurrent: int, max_clients: int = 10000):
+        self.name = name
+        # (method, path prefix) pairs
+        self.routes = routes
+        self.limiter = TokenBucketLimiter(rate, burst, max_clients)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.rejected = 0
+        self.admitted = 0
+
+    def matches(self, method: str, path: str) -> bool:
+        for route_method, prefix in self.routes:
+            if method == route_method and path.startswith(prefix):
+                return True
+        return False
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that rejects overload fast instead of queueing it.
+
+    Requests that exceed their client's token bucket get 429 with
+    Retry-After; requests that would exceed a route class's concurrency
+    cap get 503. Routes outside every class pass straight through.
+    """
+
+    def __init__(self, app, route_classes: List[RouteClass]):
+        self.app = app
+        self.route_classes = route_classes
+
+    def classify(self, method: str, path: str) -> Optional[RouteClass]:
+        for route_class in self.route_classes:
+            if route_class.matches(method, path):
+                return route_class
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_key = client[0] if client else "unknown"
+        retry_after = route_class.limiter.acquire(client_key)
+        if retry_after:
+            route_class.rejected += 1
+            await self._reject(send, 429, "Rate limit exceeded", retry_after)
+            return
+        if route_class.in_flight >= route_class.max_concurrent:
+            route_class.rejected += 1
+            await self._reject(send, 503, "Server busy, try again shortly", 1)
+            return
+
+        route_class.in_flight += 1
+        route_class.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.in_flight -= 1
+
+    @staticmethod
+    async def _reject(send, status: int, message: str, retry_after: float):
+        body = json.dumps({"error": message}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,60 @@
+from typing import Dict
+
+import numpy as np
+
+
+class ColumnTable:
+    """Struct-of-arrays table with amortized O(1) appends"""
+
+    def __init__(self, columns: Dict[str, str], capacity: int = 1024):
+        self.size = 0
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name][:self.size]
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2)
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def append(self, **values) -> int:
+        self._reserve(1)
+        row = self.size
+        for name, value in values.items():
+            self.columns[name][row] = value
+        self.size += 1
+        return row
+
+    def insert(self, row: int, **values) -> None:
+        """Insert one row before ``row``, shifting later rows down (O(n))"""
+        self._reserve(1)
+        for name, column in self.columns.items():
+            column[row + 1:self.size + 1] = column[row:self.size]
+            column[row] = values.get(name, 0)
+        self.size += 1
+
+    def extend(self, count: int, **values) -> None:
+        if not count:
+            return
+        self._reserve(count)
+        for name, value in values.items():
+            self.columns[name][self.size:self.size + count] = value
+        self.size += count
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop every row where ``mask`` is False, compacting in place"""
+        kept = int(mask.sum())
+        for column in self.columns.values():
+            column[:kept] = column[:self.size][mask]
+        self.size = kept
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
@@ -0,0 +1,136 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+
+
+def _collapse(frame) -> str:
+    """Render a frame chain as a root-first ``a;b;c`` collapsed stack"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler producing collapsed stacks.
+
+    A background thread reads ``sys._current_frames()`` every ``interval``
+    seconds, so the profiled code is never instrumented. The output is the
+    folded format consumed by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.samples[f"{names.get(thread_id, thread_id)};{_collapse(frame)}"] += 1
+            self.sample_count += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    async def run_for(self, seconds: float) -> str:
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self.collapsed()
+
+
+class StallDetector:
+    """Logs event-loop callbacks that block for longer than ``threshold`` seconds.
+
+    A heartbeat coroutine on the loop stamps the time every ``threshold / 4``;
+    a watchdog thread notices when the stamp stops moving and captures the
+    loop thread's stack while it is still stuck in the offending callback.
+    The recorded ``blocked_ms`` is updated until the loop runs again.
+    """
+
+    def __init__(self, threshold: float = 0.1, history: int = 50):
+        self.threshold = threshold
+        self.stalls = deque(maxlen=history)
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._stop = threading.Event()
+        self._heartbeat_task = None
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        period = self.threshold / 4
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(period)
+
+    def _watch(self):
+        period = self.threshold / 4
+        reported_beat = None
+        stall = None
+        while not self._stop.wait(period):
+            beat = self._last_beat
+            if stall is not None and beat != reported_beat:
+                # The loop is running again: the stall lasted until this beat
+                stall["blocked_ms"] = round((beat - reported_beat) * 1000, 1)
+                stall["resolved"] = True
+                print(f"✅ Event loop stall resolved after {stall['blocked_ms']:.0f} ms")
+                stall = None
+            blocked_for = time.monotonic() - beat
+            if stall is not None:
+                stall["blocked_ms"] = round(blocked_for * 1000, 1)
+                continue
+            if blocked_for < self.threshold:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            # blocked_ms keeps growing until the heartbeat moves again
+            stall = {
+                "detected_at": datetime.now().isoformat(),
+                "blocked_ms": round(blocked_for * 1000, 1),
+                "resolved": False,
+                "stack": stack,
+            }
+            self.stalls.append(stall)
+            print(f"⚠️ Event loop blocked for {blocked_for * 1000:.0f} ms so far:\n{stack}")
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="stall-detector", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+class StreamSubscriber:
+    __slots__ = ("queue", "lagged")
+
+    def __init__(self, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+
+class EventStreamHub:
+    """Fan-out of pre-encoded Server-Sent Events with a bounded replay buffer.
+
+    Every broadcast is framed once as ``id: <boot>-N`` / ``data: <json>``
+    bytes and the same object is queued for every subscriber and kept in the
+    replay buffer, which holds at most ``replay_size`` frames and
+    ``replay_bytes`` bytes. A client reconnecting with ``Last-Event-ID`` gets
+    the frames it missed if they are still buffered, with every full price
+    snapshot but the newest left out; otherwise, or if the id comes from
+    another process, it restarts from the most recent snapshot. Subscribers
+    that fall ``queue_size`` frames behind are disconnected so they resume
+    from the buffer instead of holding memory.
+    """
+
+    def __init__(self, replay_size: int = 512, replay_bytes: int = 8 * 1024 * 1024,
+                 queue_size: int = 64, max_streams: int = 10000):
+        # (event id, frame, is snapshot)
+        self.replay = deque()
+        self.replay_size = replay_size
+        self.replay_bytes = replay_bytes
+        self.replay_nbytes = 0
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+        self.subscribers = set()
+        # Ids from a previous process must not look resumable after a restart
+        self.boot_id = os.urandom(4).hex()
+        self.last_event_id = 0
+        # (event id, frame) of the latest full price_update
+        self.last_snapshot: Optional[Tuple[int, bytes]] = None
+
+    def publish(self, json_text: str, snapshot: bool = False) -> bytes:
+        self.last_event_id += 1
+        frame = f"id: {self.boot_id}-{self.last_event_id}\ndata: {json_text}\n\n".encode("utf-8")
+        self.replay.append((self.last_event_id, frame, snapshot))
+        self.replay_nbytes += len(frame)
+        while len(self.replay) > 1 and (len(self.replay) > self.replay_size
+                                        or self.replay_nbytes > self.replay_bytes):
+            self.replay_nbytes -= len(self.replay.popleft()[1])
+        if snapshot:
+            self.last_snapshot = (self.last_event_id, frame)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                subscriber.lagged = True
+                self.subscribers.discard(subscriber)
+        return frame
+
+    def _parse_id(self, last_event_id: Optional[str]) -> Optional[int]:
+        boot_id, _, number = (last_event_id or "").partition("-")
+        if boot_id != self.boot_id:
+            return None
+        try:
+            return int(number)
+        except ValueError:
+            return None
+
+    def backlog(self, last_event_id: Optional[str]) -> List[bytes]:
+        """Frames a (re)connecting client needs before live updates"""
+        resume_from = self._parse_id(last_event_id)
+        snapshot_id = self.last_snapshot[0] if self.last_snapshot else 0
+        if (resume_from is not None and self.replay
+                and self.replay[0][0] - 1 <= resume_from <= self.last_event_id):
+            # Older full snapshots are superseded by the newest one
+            return [frame for event_id, frame, snapshot in self.replay
+                    if event_id > resume_from and (not snapshot or event_id == snapshot_id)]
+        if self.last_snapshot is None:
+            return []
+        return [self.last_snapshot[1]] + [frame for event_id, frame, _ in self.replay if event_id > snapshot_id]
+
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_streams
+
+    def open(self) -> Optional[StreamSubscriber]:
+        if self.full():
+            return None
+        subscriber = StreamSubscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def close(self, subscriber: StreamSubscriber) -> None:
+        self.subscribers.discard(subscriber)
@@ -0,0 +1,354 @@
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+# Fields every source reports per symbol, in CRYPTO_PAIRS units
+QUOTE_FIELDS = ("price", "change", "volume", "high24h", "low24h")
+
+COINGECKO_IDS = {
+    "BTCUSDT": "bitcoin",
+    "ETHUSDT": "ethereum",
+    "BNBUSDT": "binancecoin",
+    "ADAUSDT": "cardano",
+    "SOLUSDT": "solana",
+    "DOTUSDT": "polkadot"
+}
+
+
+class PriceSource:
+    """Base class for upstream price sources.
+
+    Subclasses implement ``fetch`` returning ``{symbol: {field: value}}`` for
+    the symbols they know about, and raise on failure.
+    """
+
+    name = "source"
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, dict]:
+        raise NotImplementedError
+
+
+class BinanceRestSource(PriceSource):
+    name = "binance"
+
+    def __init__(self, base_url: str = "https://api.binance.com/api/v3", timeout: float = 10):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def _fetch_sync(self, symbols: List[str]) -> Dict[str, dict]:
+        response = requests.get(
+            f"{self.base_url}/ticker/24hr",
+            params={"symbols": json.dumps(symbols, separators=(",", ":"))},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        quotes = {}
+        for ticker in response.json():
+            quotes[ticker["symbol"]] = {
+                "price": float(ticker["lastPrice"]),
+                "change": float(ticker["priceChangePercent"]),
+                "volume": float(ticker["quoteVolume"]),
+                "high24h": float(ticker["highPrice"]),
+                "low24h": float(ticker["lowPrice"]),
+            }
+        return quotes
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, dict]:
+        return await asyncio.to_thread(self._fetch_sync, symbols)
+
+
+class CoinGeckoSource(PriceSource):
+    name = "coingecko"
+
+    def __init__(self, coin_ids: Optional[Dict[str, str]] = None, timeout: float = 10):
+        self.coin_ids = coin_ids or COINGECKO_IDS
+        self.timeout = timeout
+
+    def _fetch_sync(self, symbols: List[str]) -> Dict[str, dict]:
+        wanted = {symbol: self.coin_ids[symbol] for symbol in symbols if symbol in self.coin_ids}
+        if not wanted:
+            return {}
+        response = requests.get(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={
+                "ids": ",".join(wanted.values()),
+                "vs_currencies": "usd",
+                "include_24hr_change": "true",
+                "include_24hr_vol": "true",
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        price_data = response.json()
+
+        quotes = {}
+        for symbol, coin_id in wanted.items():
+            if coin_id not in price_data:
+                continue
+            coin_data = price_data[coin_id]
+            current_price = coin_data['usd']
+            price_change = coin_data.get('usd_24h_change') or 0
+            # CoinGecko's simple API has no 24h range, estimate it from the change
+            high_24h = current_price * (1 + abs(price_change) / 100) if price_change > 0 else current_price * 1.02
+            low_24h = current_price * (1 - abs(price_change) / 100) if price_change < 0 else current_price * 0.98
+            quotes[symbol] = {
+                "price": current_price,
+                "change": price_change,
+                "volume": coin_data.get('usd_24h_vol') or 0,
+                "high24h": high_24h,
+                "low24h": low_24h,
+            }
+        return quotes
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, dict]:
+        return await asyncio.to_thread(self._fetch_sync, symbols)
+
+
+class LocalFeedSource(PriceSource):
+    """Reads quotes from a JSON file kept up to date by another local process"""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _fetch_sync(self, symbols: List[str]) -> Dict[str, dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+        return {
+            symbol: {field: float(feed[symbol].get(field) or 0) for field in QUOTE_FIELDS}
+            for symbol in symbols if symbol in feed and feed[symbol].get("price")
+        }
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, dict]:
+        return await asyncio.to_thread(self._fetch_sync, symbols)
+
+
+class StubSource(PriceSource):
+    """In-process source with injected latency and failures, for tests and benchmarks"""
+
+    def __init__(self, name: str, prices: Dict[str, float], delay: float = 0.05,
+                 jitter: float = 0.0, tail_probability: float = 0.0, tail_delay: float = 0.0,
+                 failure_rate: float = 0.0, skew: float = 0.0, seed: Optional[int] = None):
+        self.name = name
+        self.prices = prices
+        self.delay = delay
+        self.jitter = jitter
+        self.tail_probability = tail_probability
+        self.tail_delay = tail_delay
+        self.failure_rate = failure_rate
+        self.skew = skew
+        self.random = random.Random(seed)
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, dict]:
+        delay = self.delay + self.random.uniform(0, self.jitter)
+        if self.random.random() < self.tail_probability:
+            delay += self.tail_delay
+        await asyncio.sleep(delay)
+        if self.random.random() < self.failure_rate:
+            raise ConnectionError(f"{self.name}: injected failure")
+        quotes = {}
+        for symbol in symbols:
+            if symbol in self.prices:
+                price = self.prices[symbol] * (1 + self.skew)
+                quotes[symbol] = {"price": price, "change": 0.0, "volume": 0.0,
+                                  "high24h": price, "low24h": price}
+        return quotes
+
+
+class LatencyTracker:
+    """Sliding window of recent fetch latencies for one source"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class MultiSourceFetcher:
+    """Query several price sources at once and merge them into one quote book.
+
+    Each source gets a hedged request: if the first attempt has not answered
+    by the source's ``hedge_percentile`` latency, a second identical request
+    is sent and whichever finishes first wins. Once ``quorum`` sources have
+    answered, the rest get ``grace`` more seconds so the median has as many
+    prices as possible to reject an outlier; then (or after ``timeout``)
+    the answers are combined per symbol by median or first-valid consensus.
+    Slower attempts keep running in the background so their latency is
+    still recorded.
+
+    The default median quorum is a majority only with three or more
+    sources: two prices cannot outvote each other, so waiting for both
+    would only tie every fetch to the slower one. A merged quote lists in
+    ``sources`` the sources whose price is within ``tolerance`` (relative)
+    of the chosen one.
+    """
+
+    def __init__(self, sources: List[PriceSource], consensus: str = "median",
+                 quorum: Optional[int] = None, hedge_percentile: float = 0.95,
+                 min_samples: int = 20, timeout: float = 10, grace: float = 0.25,
+                 tolerance: float = 0.005):
+        if consensus not in ("median", "first"):
+            raise ValueError(f"Unknown consensus mode: {consensus}")
+        self.sources = sources
+        self.consensus = consensus
+        if quorum is None:
+            quorum = len(sources) // 2 + 1 if consensus == "median" and len(sources) >= 3 else 1
+        self.quorum = max(1, min(quorum, len(sources)))
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.timeout = timeout
+        self.grace = grace
+        self.tolerance = tolerance
+        self.latency = {source.name: LatencyTracker() for source in sources}
+        self.hedges_sent = 0
+        self._background = set()
+
+    def _keep_running(self, task: asyncio.Task) -> None:
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        # Nobody awaits these any more; fetch the exception so it isn't logged
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _timed_fetch(self, source: PriceSource, symbols: List[str]) -> Dict[str, dict]:
+        started = time.perf_counter()
+        quotes = await source.fetch(symbols)
+        self.latency[source.name].record(time.perf_counter() - started)
+        return quotes
+
+    async def _fetch_hedged(self, source: PriceSource, symbols: List[str]) -> Dict[str, dict]:
+        tracker = self.latency[source.name]
+        threshold = None
+        if len(tracker.samples) >= self.min_samples:
+            threshold = tracker.percentile(self.hedge_percentile)
+
+        primary = asyncio.ensure_future(self._timed_fetch(source, symbols))
+        if threshold is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done:
+            return primary.result()
+
+        self.hedges_sent += 1
+        hedge = asyncio.ensure_future(self._timed_fetch(source, symbols))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        self._keep_running(loser)
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def fetch(self, symbols: List[str]) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """Fetch ``symbols`` from all sources.
+
+        Returns ``(quotes, errors)`` where quotes maps symbol to the merged
+        quote plus the names of the sources that agreed on it, and errors
+        maps source name to the failure for sources that did not answer.
+        """
+        tasks = {
+            asyncio.ensure_future(self._fetch_hedged(source, symbols)): source
+            for source in self.sources
+        }
+        results = {}
+        errors = {}
+        pending = set(tasks)
+        deadline = time.perf_counter() + self.timeout
+        while pending:
+            if len(results) >= self.quorum:
+                if self.consensus == "first" or not self.grace:
+                    break
+                # Stragglers get ``grace`` from when quorum was first reached
+                deadline = min(deadline, time.perf_counter() + self.grace)
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task].name
+                if task.exception() is None:
+                    results[name] = task.result()
+                else:
+                    errors[name] = str(task.exception())
+        for task in pending:
+            errors[tasks[task].name] = "not used (no answer within grace period or timeout)"
+            self._keep_running(task)
+
+        # Keep source priority order so "first" consensus is deterministic
+        ordered = [(source.name, results[source.name]) for source in self.sources if source.name in results]
+        return self._merge(symbols, ordered), errors
+
+    def _merge(self, symbols: List[str], results: List[Tuple[str, Dict[str, dict]]]) -> Dict[str, dict]:
+        merged = {}
+        for symbol in symbols:
+            candidates = [
+                (name, quotes[symbol]) for name, quotes in results
+                if symbol in quotes and quotes[symbol].get("price")
+            ]
+            if not candidates:
+                continue
+            if self.consensus == "first":
+                name, quote = candidates[0]
+                merged[symbol] = {**{field: quote.get(field, 0) for field in QUOTE_FIELDS}, "sources": [name]}
+            else:
+                # Price: the quote nearest the median, so an even count never
+                # averages in an outlier (ties go to the higher-priority source).
+                median = statistics.median(quote["price"] for _, quote in candidates)
+                _, nearest = min(candidates, key=lambda candidate: abs(candidate[1]["price"] - median))
+                # Volume and 24h range differ in meaning between sources
+                # (exchange vs global volume, estimated range), so they all
+                # come from the highest-priority source that answered.
+                _, primary = candidates[0]
+                merged[symbol] = {field: primary.get(field) or 0 for field in QUOTE_FIELDS}
+                price = nearest["price"]
+                merged[symbol]["price"] = price
+                merged[symbol]["sources"] = [
+                    name for name, quote in candidates
+                    if abs(quote["price"] - price) <= self.tolerance * price
+                ]
+        return merged
+
+
+def build_price_fetcher(binance_url: str = "https://api.binance.com/api/v3") -> MultiSourceFetcher:
+    """Build the fetcher from PRICE_SOURCES / PRICE_CONSENSUS / LOCAL_PRICE_FEED /
+    PRICE_GRACE_MS / PRICE_TOLERANCE_PCT"""
+    available = {
+        "binance": lambda: BinanceRestSource(binance_url),
+        "coingecko": lambda: CoinGeckoSource(),
+    }
+    local_feed = os.environ.get('LOCAL_PRICE_FEED')
+    if local_feed:
+        available["local"] = lambda: LocalFeedSource(local_feed)
+
+    default_sources = "binance,coingecko,local" if local_feed else "binance,coingecko"
+    names = [name.strip() for name in os.environ.get('PRICE_SOURCES', default_sources).split(",") if name.strip()]
+    sources = [available[name]() for name in names if name in available]
+    if not sources:
+        sources = [CoinGeckoSource()]
+
+    return MultiSourceFetcher(
+        sources,
+        consensus=os.environ.get('PRICE_CONSENSUS', 'median'),
+        hedge_percentile=float(os.environ.get('PRICE_HEDGE_PERCENTILE', '0.95')),
+        grace=float(os.environ.get('PRICE_GRACE_MS', '250')) / 1000,
+        tolerance=float(os.environ.get('PRICE_TOLERANCE_PCT', '0.5')) / 100
+    )
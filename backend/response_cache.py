@@ -0,0 +1,106 @@
+import gzip
+import os
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from ws_protocol import encode_json
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are cheaper to send than to compress
+MIN_COMPRESS_SIZE = 1024
+
+
+class CachedEntry:
+    __slots__ = ("version", "etag", "body", "variants")
+
+    def __init__(self, version: int, etag: str, body: bytes):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        # Lazily built compressed bodies keyed by content-encoding
+        self.variants = {}
+
+
+class ResponseCache:
+    """Serialize read-heavy resources once per version and serve raw bytes.
+
+    Writers call ``invalidate(name)`` after mutating the data behind a
+    resource; readers call ``respond(name, request, build)`` which only runs
+    ``build`` and the JSON encoder when the version has moved.
+    """
+
+    def __init__(self):
+        self.versions = {}
+        self.entries = {}
+        # Keeps ETags from a previous process from matching after a restart
+        self.boot_id = os.urandom(4).hex()
+
+    def invalidate(self, *names: str) -> None:
+        for name in names:
+            self.versions[name] = self.versions.get(name, 0) + 1
+
+    def get_entry(self, name: str, build: Callable[[], dict]) -> CachedEntry:
+        version = self.versions.get(name, 0)
+        entry = self.entries.get(name)
+        if entry is None or entry.version != version:
+            body = encode_json(build()).encode("utf-8")
+            entry = CachedEntry(version, f'"{self.boot_id}-{name}-{version}"', body)
+            self.entries[name] = entry
+        return entry
+
+    def respond(self, name: str, request: Request, build: Callable[[], dict]) -> Response:
+        entry = self.get_entry(name, build)
+        encoding = self._pick_encoding(request.headers.get("accept-encoding", ""), len(entry.body))
+        headers = {
+            "ETag": _variant_etag(entry.etag, encoding),
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+                    for tag in if_none_match.split(",")}
+            # Any coding of the current version is still fresh for the client
+            current = {_variant_etag(entry.etag, coding) for coding in (None, "gzip", "br")}
+            if "*" in tags or tags & current:
+                return Response(status_code=304, headers=headers)
+
+        body = entry.body
+        if encoding:
+            if encoding not in entry.variants:
+                if encoding == "br":
+                    entry.variants[encoding] = brotli.compress(body, quality=5)
+                else:
+                    entry.variants[encoding] = gzip.compress(body, compresslevel=6)
+            body = entry.variants[encoding]
+            headers["Content-Encoding"] = encoding
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _pick_encoding(accept_encoding: str, size: int):
+        if size < MIN_COMPRESS_SIZE or not accept_encoding:
+            return None
+        accepted = set()
+        for part in accept_encoding.split(","):
+            coding, _, params = part.partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip().lower())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+
+def _variant_etag(etag: str, encoding) -> str:
+    """Distinct strong validator per content-coding (RFC 9110 8.8.3)"""
+    return etag if not encoding else f'{etag[:-1]}-{encoding}"'
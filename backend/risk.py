@@ -0,0 +1,180 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# One-sided normal quantiles for parametric VaR
+Z_SCORES = {0.95: 1.6448536269514722, 0.99: 2.3263478740408408}
+
+
+class RollingCovariance:
+    """Incrementally updated covariance of per-bar log returns.
+
+    ``method="ewma"`` (default) weights recent bars with ``alpha`` so the
+    matrix tracks changing regimes; ``method="welford"`` keeps the exact
+    running covariance of every bar seen. Both are O(n^2) per bar and run
+    as a handful of NumPy passes. ``step`` only reads the current state
+    and returns the next one, so it can run in a worker thread while the
+    event loop keeps reading ``cov``; ``apply`` then installs the result
+    on the loop.
+    """
+
+    def __init__(self, symbols: List[str], method: str = "ewma", alpha: float = 0.06):
+        if method not in ("ewma", "welford"):
+            raise ValueError(f"Unknown covariance method: {method}")
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.method = method
+        self.alpha = alpha
+        n = len(self.symbols)
+        self.mean = np.zeros(n)
+        self.cov = np.zeros((n, n))
+        self.last_prices = np.full(n, np.nan)
+        self.bars = 0
+        # Welford's running sum of co-moments
+        self._m2 = np.zeros((n, n)) if method == "welford" else None
+
+    def prices_vector(self, prices: Dict[str, float]) -> np.ndarray:
+        vector = self.last_prices.copy()
+        for symbol, price in prices.items():
+            i = self.index.get(symbol)
+            if i is not None and price and price > 0:
+                vector[i] = price
+        return vector
+
+    def step(self, prices: np.ndarray) -> tuple:
+        """State after one more bar of prices (aligned with ``symbols``); nothing is modified"""
+        previous = self.last_prices
+        prices = prices.copy()
+        if np.isnan(previous).all():
+            return prices, self.bars, self.mean, self._m2, self.cov
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.log(prices / previous)
+        # Symbols without a fresh price this bar count as unchanged
+        returns[~np.isfinite(returns)] = 0.0
+        bars = self.bars + 1
+
+        delta = returns - self.mean
+        if self.method == "ewma":
+            mean = self.mean + self.alpha * delta
+            cov = np.multiply.outer(delta, self.alpha * delta)
+            cov += self.cov
+            cov *= 1 - self.alpha
+            return prices, bars, mean, None, cov
+        mean = self.mean + delta / bars
+        m2 = self._m2 + np.multiply.outer(delta, returns - mean)
+        cov = m2 / (bars - 1) if bars >= 2 else self.cov
+        return prices, bars, mean, m2, cov
+
+    def apply(self, state: tuple) -> None:
+        """Install a state returned by ``step``"""
+        self.last_prices, self.bars, self.mean, self._m2, self.cov = state
+
+    def update(self, prices: np.ndarray) -> None:
+        """Add one bar of prices (aligned with ``symbols``)"""
+        self.apply(self.step(prices))
+
+    def correlation(self, symbols: Optional[List[str]] = None) -> np.ndarray:
+        idx = [self.index[s] for s in symbols] if symbols is not None else slice(None)
+        cov = self.cov[np.ix_(idx, idx)] if symbols is not None else self.cov
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = 0.0
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+
+class RiskEngine:
+    """Portfolio exposure, parametric VaR and pre-trade limit checks.
+
+    Exposure is signed quote notional per symbol (long positive). VaR is
+    ``z * sqrt(w' S w)`` over one bar of ``bar_seconds``; callers feed
+    ``on_bar`` on that fixed clock so the horizon is well defined, or split
+    it into ``prepare_bar`` in a worker thread and ``apply_bar`` on the
+    loop so the cache is never reset under a running check. ``S w``
+    is cached between bars so a pre-trade check for a single-symbol order
+    is O(1) once it is warm.
+    """
+
+    def __init__(self, symbols: List[str], confidence: float = 0.99, bar_seconds: float = 60,
+                 **covariance_options):
+        if confidence not in Z_SCORES:
+            raise ValueError(f"Unsupported VaR confidence: {confidence}")
+        self.covariance = RollingCovariance(symbols, **covariance_options)
+        self.confidence = confidence
+        self.z = Z_SCORES[confidence]
+        self.bar_seconds = bar_seconds
+        self.exposure = np.zeros(len(symbols))
+        self._cov_w = None
+        self._variance = None
+
+    def _refresh(self) -> None:
+        if self._cov_w is None:
+            self._cov_w = self.covariance.cov @ self.exposure
+            self._variance = float(self.exposure @ self._cov_w)
+
+    def prepare_bar(self, prices: Dict[str, float]) -> tuple:
+        """The O(n^2) part of ``on_bar``; reads but does not modify the engine"""
+        return self.covariance.step(self.covariance.prices_vector(prices))
+
+    def apply_bar(self, state: tuple) -> None:
+        self.covariance.apply(state)
+        self._cov_w = None
+
+    def on_bar(self, prices: Dict[str, float]) -> None:
+        self.apply_bar(self.prepare_bar(prices))
+
+    def add_exposure(self, symbol: str, notional: float) -> None:
+        i = self.covariance.index.get(symbol)
+        if i is None:
+            return
+        if self._cov_w is not None:
+            # Rank-one update keeps the cache valid without a full mat-vec
+            self._variance += 2 * notional * self._cov_w[i] + notional * notional * self.covariance.cov[i, i]
+            self._cov_w += notional * self.covariance.cov[:, i]
+        self.exposure[i] += notional
+
+    def reset_exposure(self) -> None:
+        self.exposure[:] = 0.0
+        self._cov_w = None
+
+    def value_at_risk(self) -> float:
+        self._refresh()
+        return self.z * math.sqrt(max(self._variance, 0.0))
+
+    def check_order(self, symbol: str, notional: float, max_var: float = 0,
+                    max_gross_exposure: float = 0) -> Tuple[bool, str]:
+        """Would adding ``notional`` of ``symbol`` breach either limit (0 = off)?"""
+        i = self.covariance.index.get(symbol)
+        if i is None:
+            return True, ""
+        if max_gross_exposure:
+            gross = float(np.abs(self.exposure).sum()) - abs(self.exposure[i]) + abs(self.exposure[i] + notional)
+            if gross > max_gross_exposure:
+                return False, f"gross exposure {gross:.2f} would exceed limit {max_gross_exposure:.2f}"
+        if max_var:
+            self._refresh()
+            variance = self._variance + 2 * notional * self._cov_w[i] + notional * notional * self.covariance.cov[i, i]
+            var_after = self.z * math.sqrt(max(variance, 0.0))
+            if var_after > max_var:
+                return False, f"portfolio VaR {var_after:.2f} would exceed limit {max_var:.2f}"
+        return True, ""
+
+    def summary(self) -> dict:
+        symbols = self.covariance.symbols
+        held = [symbols[i] for i in np.flatnonzero(self.exposure)]
+        corr = self.covariance.correlation(held) if held else np.zeros((0, 0))
+        return {
+            "bars": self.covariance.bars,
+            "confidence": self.confidence,
+            "horizon_seconds": self.bar_seconds,
+            "value_at_risk": self.value_at_risk(),
+            "gross_exposure": float(np.abs(self.exposure).sum()),
+            "net_exposure": float(self.exposure.sum()),
+            "exposure": {symbols[i]: float(self.exposure[i]) for i in np.flatnonzero(self.exposure)},
+            "correlation": {
+                a: {b: round(float(corr[i, j]), 4) for j, b in enumerate(held)}
+                for i, a in enumerate(held)
+            },
+        }
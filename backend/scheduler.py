@@ -0,0 +1,162 @@
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional
+
+# Refresh tiers as multiples of the base price_update_interval
+MIN_INTERVAL = 1
+MAX_INTERVAL = 3600
+TIER_HOT = 0
+TIER_WARM = 1
+TIER_COLD = 2
+TIER_MULTIPLIERS = (1, 4, 16)
+TIER_NAMES = ("hot", "warm", "cold")
+
+
+class SymbolState:
+    __slots__ = ("symbol", "tier", "last_price", "last_observed", "volatility", "subscribers")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.tier = TIER_HOT
+        self.last_price = None
+        self.last_observed = None
+        # EWMA of absolute log returns, normalized to one base interval
+        self.volatility = 0.0
+        self.subscribers = 0
+
+
+class PollingScheduler:
+    """Decides which symbols to refresh and when.
+
+    Symbols any client watches always refresh every base interval, so
+    clients get the ``update_interval`` they were told. Unwatched symbols
+    are placed in tiers from their recent volatility: very volatile ones
+    every base interval, moving ones every 4x and the rest every 16x, but
+    never less often than ``max_period`` seconds (when set) so consumers
+    sampling prices on a fixed clock, like the risk engine, see every
+    symbol move at least once per sample.
+    Each tier has its own deadline and is fetched as a whole in batches of
+    ``batch_size``, so symbols with the same cadence share upstream calls.
+    ``set_base_interval`` wakes a pending ``wait`` so setting changes apply
+    immediately rather than after the current sleep.
+    """
+
+    def __init__(self, symbols: List[str], base_interval: float = 5, batch_size: int = 100,
+                 hot_volatility: float = 0.002, warm_volatility: float = 0.0005, alpha: float = 0.2,
+                 max_period: Optional[float] = None):
+        self.base_interval = _clamp_interval(base_interval)
+        self.batch_size = batch_size
+        self.hot_volatility = hot_volatility
+        self.warm_volatility = warm_volatility
+        self.alpha = alpha
+        self.max_period = max_period
+        self.states: Dict[str, SymbolState] = {}
+        # Next deadline per tier; 0 means due now
+        self.next_due = [0.0] * len(TIER_MULTIPLIERS)
+        # The Event is created by the first wait() so it belongs to the
+        # running loop; this object is built at import time
+        self._wake: Optional[asyncio.Event] = None
+        self._woken = False
+        self.set_symbols(symbols)
+
+    def set_symbols(self, symbols: List[str]) -> None:
+        for symbol in symbols:
+            if symbol not in self.states:
+                self.states[symbol] = SymbolState(symbol)
+        for symbol in list(self.states):
+            if symbol not in symbols:
+                del self.states[symbol]
+
+    def set_base_interval(self, seconds: float) -> None:
+        seconds = _clamp_interval(seconds)
+        if seconds != self.base_interval:
+            self.base_interval = seconds
+            self.next_due = [0.0] * len(TIER_MULTIPLIERS)
+            self._notify()
+
+    def subscribe(self, symbols: List[str]) -> None:
+        for symbol in symbols:
+            state = self.states.get(symbol)
+            if state is not None:
+                state.subscribers += 1
+                if state.tier != self._tier_for(state):
+                    # A newly watched symbol should not wait out a cold cycle
+                    state.tier = self._tier_for(state)
+                    self.next_due[state.tier] = 0.0
+                    self._notify()
+
+    def unsubscribe(self, symbols: List[str]) -> None:
+        for symbol in symbols:
+            state = self.states.get(symbol)
+            if state is not None and state.subscribers > 0:
+                state.subscribers -= 1
+                state.tier = self._tier_for(state)
+
+    def _tier_for(self, state: SymbolState) -> int:
+        if state.subscribers or state.volatility >= self.hot_volatility:
+            return TIER_HOT
+        if state.volatility >= self.warm_volatility:
+            return TIER_WARM
+        return TIER_COLD
+
+    def observe(self, symbol: str, price: float, now: Optional[float] = None) -> None:
+        """Feed a fresh price so the symbol's volatility and tier stay current"""
+        state = self.states.get(symbol)
+        if state is None or not price or price <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        if state.last_price and state.last_observed is not None and now > state.last_observed:
+            elapsed = max(now - state.last_observed, self.base_interval)
+            move = abs(math.log(price / state.last_price)) / math.sqrt(elapsed / self.base_interval)
+            state.volatility += self.alpha * (move - state.volatility)
+        state.last_price = price
+        state.last_observed = now
+        state.tier = self._tier_for(state)
+
+    def due_batches(self, now: Optional[float] = None) -> List[List[str]]:
+        """Symbol batches to fetch now; advances the deadline of every due tier"""
+        now = time.monotonic() if now is None else now
+        due_tiers = [tier for tier, deadline in enumerate(self.next_due) if deadline <= now]
+        if not due_tiers:
+            return []
+        for tier in due_tiers:
+            self.next_due[tier] = now + self.period(tier)
+        symbols = [state.symbol for state in self.states.values() if state.tier in due_tiers]
+        return [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+
+    def period(self, tier: int) -> float:
+        """Refresh period of a tier in seconds"""
+        period = self.base_interval * TIER_MULTIPLIERS[tier]
+        if self.max_period:
+            period = min(period, max(self.base_interval, self.max_period))
+        return period
+
+    def _notify(self) -> None:
+        self._woken = True
+        if self._wake is not None:
+            self._wake.set()
+
+    async def wait(self) -> None:
+        """Sleep until the next tier is due or the schedule changes"""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if not self._woken:
+            timeout = max(0.0, min(self.next_due) - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._woken = False
+        self._wake.clear()
+
+    def tiers(self) -> Dict[str, List[str]]:
+        result = {name: [] for name in TIER_NAMES}
+        for state in self.states.values():
+            result[TIER_NAMES[state.tier]].append(state.symbol)
+        return result
+
+
+def _clamp_interval(seconds: float) -> float:
+    """Keep the base interval in the documented 1-3600 s range"""
+    return min(max(seconds, MIN_INTERVAL), MAX_INTERVAL)
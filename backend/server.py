@@ -1,21 +1,66 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import asyncio
 import json
 import random
 import time
-import requests
 from datetime import datetime, timedelta
 import uuid
 from typing import Optional, List
 import os
+import hmac
+from contextlib import asynccontextmanager
+from accounts import AccountBook
+from admission import AdmissionMiddleware, RouteClass
+from diagnostics import SamplingProfiler, StallDetector
+from event_stream import EventStreamHub
+from price_sources import build_price_fetcher
+from response_cache import ResponseCache
+from risk import RiskEngine
+from scheduler import PollingScheduler
+from trade_stats import TradeStats
+from snapshot import load_snapshot, persist_snapshot
+from ws_protocol import SUBPROTOCOL_BINARY, SymbolTable, encode_message, negotiate
 # AI imports removed for simplified version
 # from emergentintegrations.llm.chat import LlmChat, UserMessage
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Serve the last snapshot immediately and refresh from upstream in the background"""
+    global stall_detector
+    if STALL_THRESHOLD_MS > 0:
+        stall_detector = StallDetector(STALL_THRESHOLD_MS / 1000)
+        stall_detector.start()
+    snapshot = load_snapshot()
+    if snapshot and snapshot["pairs"]:
+        CRYPTO_PAIRS.update(snapshot["pairs"])
+        ai_signals.update(snapshot["ai_signals"])
+        response_cache.invalidate("pairs", "pairs_all", "ai_signals")
+        print(f"✅ Loaded market snapshot with {len(CRYPTO_PAIRS)} pairs (stale until refreshed)")
+    pump_task = asyncio.create_task(price_pump())
+    risk_task = asyncio.create_task(risk_bar_clock())
+    yield
+    pump_task.cancel()
+    risk_task.cancel()
+    if stall_detector is not None:
+        stall_detector.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+# Admission control for expensive endpoints; added before CORS so that
+# 429/503 rejections still carry CORS headers
+app.add_middleware(AdmissionMiddleware, route_classes=[
+    RouteClass("trade", [("POST", "/api/trade/"), ("POST", "/api/emergency-sell"), ("POST", "/api/accounts")],
+               rate=5, burst=10, max_concurrent=32),
+    # Forces an upstream fetch, so only one may run at a time
+    RouteClass("refresh", [("POST", "/api/refresh-prices")],
+               rate=0.2, burst=2, max_concurrent=1),
+    RouteClass("ai", [("POST", "/api/generate-ai-signals")],
+               rate=0.1, burst=2, max_concurrent=2),
+])
 
 # CORS middleware
 app.add_middleware(
@@ -35,72 +80,87 @@ db = client.binance_trader
 BINANCE_API_URL = "https://api.binance.com/api/v3"
 CRYPTO_SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "SOLUSDT", "DOTUSDT"]
 
+# Upstream price sources (PRICE_SOURCES, PRICE_CONSENSUS, LOCAL_PRICE_FEED)
+price_fetcher = build_price_fetcher(BINANCE_API_URL)
+
+# Rolling return covariance and open exposure across CRYPTO_SYMBOLS, fed one
+# bar of last known prices every RISK_BAR_SECONDS (also the VaR horizon)
+RISK_BAR_SECONDS = float(os.environ.get('RISK_BAR_SECONDS', '60'))
+risk_engine = RiskEngine(CRYPTO_SYMBOLS, bar_seconds=RISK_BAR_SECONDS)
+
+# Isolated paper-trading accounts, each with its own settings and positions
+account_book = AccountBook(CRYPTO_SYMBOLS)
+
 # Global data store
 CRYPTO_PAIRS = {}
 last_binance_update = 0
 
-async def fetch_binance_prices():
-    """Fetch real prices from CoinGecko API (fallback)"""
+# Debug surface: /api/debug/* is only served when DEBUG_TOKEN is set and the
+# request carries it in X-Debug-Token. STALL_THRESHOLD_MS > 0 logs any event
+# loop callback that blocks longer than that.
+DEBUG_TOKEN = os.environ.get('DEBUG_TOKEN', '')
+STALL_THRESHOLD_MS = float(os.environ.get('STALL_THRESHOLD_MS', '0'))
+stall_detector = None
+profiler_lock = asyncio.Lock()
+
+# Serialized REST responses, invalidated whenever the data behind them changes
+response_cache = ResponseCache()
+
+async def fetch_binance_prices(symbols: Optional[List[str]] = None, persist: bool = True):
+    """Fetch prices from all configured sources and merge them by consensus"""
     global CRYPTO_PAIRS, last_binance_update
+    symbols = symbols or CRYPTO_SYMBOLS
     
     try:
-        # CoinGecko API mapping
-        coin_mapping = {
-            "BTCUSDT": "bitcoin",
-            "ETHUSDT": "ethereum", 
-            "BNBUSDT": "binancecoin",
-            "ADAUSDT": "cardano",
-            "SOLUSDT": "solana",
-            "DOTUSDT": "polkadot"
-        }
+        quotes, source_errors = await price_fetcher.fetch(symbols)
+        for source_name, error in source_errors.items():
+            print(f"⚠️ Price source {source_name} skipped: {error}")
         
-        # Get current prices
-        coin_ids = ",".join(coin_mapping.values())
-        price_response = requests.get(
-            f"https://api.coingecko.com/api/v3/simple/price?ids={coin_ids}&vs_currencies=usd&include_24hr_change=true&include_24hr_vol=true", 
-            timeout=10
-        )
-        
-        if price_response.status_code == 200:
-            price_data = price_response.json()
-        else:
-            print("Failed to fetch prices from CoinGecko")
-            return False
+        if not quotes:
+            raise RuntimeError("no price source returned data")
         
         # Update our data
-        for symbol, coin_id in coin_mapping.items():
-            if coin_id in price_data:
-                coin_data = price_data[coin_id]
-                
-                # Format symbol for display
-                base = symbol.replace('USDT', '')
-                display_symbol = f"{base}/USDT"
-                
-                current_price = coin_data['usd']
-                price_change = coin_data.get('usd_24h_change', 0)
-                volume = coin_data.get('usd_24h_vol', 0)
-                
-                # Calculate high/low from change
-                high_24h = current_price * (1 + abs(price_change) / 100) if price_change > 0 else current_price * 1.02
-                low_24h = current_price * (1 - abs(price_change) / 100) if price_change < 0 else current_price * 0.98
-                
-                CRYPTO_PAIRS[symbol] = {
-                    "symbol": display_symbol,
-                    "price": current_price,
-                    "change": price_change,
-                    "volume": volume,
-                    "high24h": high_24h,
-                    "low24h": low_24h,
-                    "lastUpdate": datetime.now().isoformat()
-                }
+        for symbol in symbols:
+            if symbol not in quotes:
+                # Every source missed this symbol; keep the last value, flagged
+                if symbol in CRYPTO_PAIRS:
+                    CRYPTO_PAIRS[symbol]["stale"] = True
+                continue
+            
+            # Format symbol for display
+            base = symbol.replace('USDT', '')
+            display_symbol = f"{base}/USDT"
+            
+            quote = quotes[symbol]
+            CRYPTO_PAIRS[symbol] = {
+                "symbol": display_symbol,
+                "price": quote["price"],
+                "change": quote["change"],
+                "volume": quote["volume"],
+                "high24h": quote["high24h"],
+                "low24h": quote["low24h"],
+                "lastUpdate": datetime.now().isoformat(),
+                "sources": quote["sources"],
+                "stale": False
+            }
+            price_scheduler.observe(symbol, quote["price"])
         
         last_binance_update = time.time()
-        print(f"✅ Updated prices from CoinGecko API for {len(CRYPTO_PAIRS)} pairs")
+        response_cache.invalidate("pairs", "pairs_all")
+        print(f"✅ Updated prices for {len(quotes)} pairs ({price_fetcher.consensus} of {len(price_fetcher.sources) - len(source_errors)} sources)")
+        if persist:
+            await persist_snapshot(CRYPTO_PAIRS, ai_signals)
         return True
         
     except Exception as e:
-        print(f"❌ Error fetching CoinGecko data: {str(e)}")
-        # Fallback to mock data if both APIs fail
+        print(f"❌ Error fetching price data: {str(e)}")
+        if CRYPTO_PAIRS:
+            # Keep serving the last known prices rather than mock constants
+            for pair_data in CRYPTO_PAIRS.values():
+                pair_data["stale"] = True
+            response_cache.invalidate("pairs", "pairs_all")
+            return True
+        # Fallback to mock data if every source fails
         await initialize_mock_data()
         return True
 
@@ -116,27 +176,104 @@ async def initialize_mock_data():
         "SOLUSDT": {"symbol": "SOL/USDT", "price": 98.45, "change": -2.10, "volume": 67000000, "high24h": 105.20, "low24h": 95.80, "lastUpdate": datetime.now().isoformat()},
         "DOTUSDT": {"symbol": "DOT/USDT", "price": 7.85, "change": 1.45, "volume": 23000000, "high24h": 8.15, "low24h": 7.60, "lastUpdate": datetime.now().isoformat()}
     }
+    response_cache.invalidate("pairs", "pairs_all")
     print("✅ Initialized with mock data as fallback")
 
-# Initialize with Binance data
-asyncio.create_task(fetch_binance_prices())
+def price_update_message() -> dict:
+    """Full price book as pushed to WebSocket and SSE clients"""
+    return {
+        "type": "price_update",
+        "data": CRYPTO_PAIRS,
+        "ai_signals": ai_signals,
+        "update_interval": current_settings.price_update_interval
+    }
+
+async def risk_bar_clock():
+    """Sample last known prices into the risk engine on a fixed, wall-aligned clock"""
+    while True:
+        await asyncio.sleep(RISK_BAR_SECONDS - time.time() % RISK_BAR_SECONDS)
+        if not CRYPTO_PAIRS:
+            continue
+        try:
+            bar = {symbol: pair_data["price"] for symbol, pair_data in CRYPTO_PAIRS.items()}
+            # O(n^2) covariance update; NumPy releases the GIL so keep it off the loop,
+            # then swap the result in here so checks on the loop see one consistent matrix
+            state = await asyncio.to_thread(risk_engine.prepare_bar, bar)
+            risk_engine.apply_bar(state)
+        except Exception as e:
+            print(f"❌ Risk bar error: {str(e)}")
+
+async def price_pump():
+    """Refresh whichever symbols are due and broadcast one update per cycle"""
+    while True:
+        try:
+            batches = price_scheduler.due_batches()
+            for batch in batches:
+                # Symbols in a batch share a tier and a single upstream call
+                await fetch_binance_prices(batch, persist=False)
+            if batches:
+                bar = {symbol: pair_data["price"] for symbol, pair_data in CRYPTO_PAIRS.items()}
+                # TP/SL for every open position of every account in one pass
+                account_book.on_tick(bar)
+                await persist_snapshot(CRYPTO_PAIRS, ai_signals)
+                await manager.broadcast(price_update_message())
+            await price_scheduler.wait()
+        except Exception as e:
+            print(f"❌ Price pump error: {str(e)}")
+            # Don't spin on a persistent error
+            await asyncio.sleep(1)
 
 # WebSocket connections
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # Negotiated subprotocol per connection (None = default JSON)
+        self.protocols = {}
+        # Symbol table version each binary client has already received
+        self.symbol_versions = {}
+        self.symbols = SymbolTable()
+        # /api/stream subscribers share the JSON frames and keep a replay buffer
+        self.streams = EventStreamHub()
 
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
+        protocol = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=protocol)
         self.active_connections.append(websocket)
+        self.protocols[websocket] = protocol
+        if protocol == SUBPROTOCOL_BINARY:
+            self.symbols.sync(CRYPTO_PAIRS)
+            await websocket.send_bytes(self.symbols.frame())
+            self.symbol_versions[websocket] = self.symbols.version
 
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
+        self.protocols.pop(websocket, None)
+        self.symbol_versions.pop(websocket, None)
+
+    async def _deliver(self, connection: WebSocket, protocol: Optional[str], message):
+        if isinstance(message, str):
+            await connection.send_text(message)
+            return
+        if protocol == SUBPROTOCOL_BINARY and self.symbol_versions.get(connection) != self.symbols.version:
+            await connection.send_bytes(self.symbols.frame())
+            self.symbol_versions[connection] = self.symbols.version
+        await connection.send_bytes(message)
+
+    async def send(self, websocket: WebSocket, data: dict):
+        protocol = self.protocols.get(websocket)
+        await self._deliver(websocket, protocol, encode_message(protocol, data, self.symbols))
 
     async def broadcast(self, data: dict):
+        # Encode once per negotiated protocol, not once per connection. JSON is
+        # always encoded because SSE clients and the replay buffer reuse it.
+        encoded = {None: encode_message(None, data, self.symbols)}
+        self.streams.publish(encoded[None], snapshot=data.get("type") == "price_update")
         for connection in self.active_connections:
             try:
-                await connection.send_text(json.dumps(data))
+                protocol = self.protocols.get(connection)
+                if protocol not in encoded:
+                    encoded[protocol] = encode_message(protocol, data, self.symbols)
+                await self._deliver(connection, protocol, encoded[protocol])
             except:
                 pass
 
@@ -153,7 +290,9 @@ class TradeSettings(BaseModel):
     ai_model: str = "gpt-4o"
     ai_provider: str = "openai"
     enable_ai_signals: bool = False
-    price_update_interval: int = 5  # seconds (1-3600)
+    price_update_interval: int = Field(5, ge=1, le=3600)  # seconds
+    max_portfolio_var: float = 0  # USD, 99% one-bar VaR; 0 disables the check
+    max_gross_exposure: float = 0  # USD across all open positions; 0 disables the check
 
 class TradeOrder(BaseModel):
     id: str
@@ -166,6 +305,17 @@ class TradeOrder(BaseModel):
     status: str = "filled"
     ai_signal: Optional[str] = None
 
+class AccountSettings(BaseModel):
+    trade_amount: Optional[float] = None
+    take_profit: Optional[float] = None
+    stop_loss: Optional[float] = None
+    activation_distance: Optional[float] = None
+    timeframe: Optional[str] = None
+
+class AccountCreate(BaseModel):
+    account_id: Optional[str] = None
+    settings: Optional[AccountSettings] = None
+
 class AISignal(BaseModel):
     pair: str
     signal: str  # "BUY", "SELL", "HOLD"
@@ -175,7 +325,13 @@ class AISignal(BaseModel):
 
 # Global settings
 current_settings = TradeSettings()
+# Every symbol refreshes at least once per risk bar, so quiet symbols don't
+# show a run of zero returns followed by one lump
+price_scheduler = PollingScheduler(CRYPTO_SYMBOLS, base_interval=current_settings.price_update_interval,
+                                   max_period=RISK_BAR_SECONDS)
 active_trades = []
+# Per-fill aggregates behind /api/trades/stats
+trade_stats = TradeStats()
 ai_signals = {}
 
 async def get_ai_trading_signal(pair: str, price_data: dict) -> Optional[AISignal]:
@@ -218,18 +374,13 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
 @app.get("/api/pairs")
-async def get_crypto_pairs():
+async def get_crypto_pairs(request: Request):
     """Get current pairs data"""
     if not CRYPTO_PAIRS:
         await fetch_binance_prices()
-    return {"pairs": CRYPTO_PAIRS}
+    return response_cache.respond("pairs", request, lambda: {"pairs": CRYPTO_PAIRS})
 
-@app.get("/api/pairs/all")
-async def get_all_pairs_with_signals():
-    """Get all pairs with current AI signals"""
-    if not CRYPTO_PAIRS:
-        await fetch_binance_prices()
-        
+def build_pairs_with_signals() -> dict:
     pairs_with_signals = {}
     
     for pair_key, pair_data in CRYPTO_PAIRS.items():
@@ -240,16 +391,19 @@ async def get_all_pairs_with_signals():
     
     return {"pairs": pairs_with_signals}
 
+@app.get("/api/pairs/all")
+async def get_all_pairs_with_signals(request: Request):
+    """Get all pairs with current AI signals"""
+    if not CRYPTO_PAIRS:
+        await fetch_binance_prices()
+    return response_cache.respond("pairs_all", request, build_pairs_with_signals)
+
 @app.post("/api/refresh-prices")
 async def refresh_binance_prices():
     """Manually refresh prices from Binance"""
     success = await fetch_binance_prices()
     if success:
-        await manager.broadcast({
-            "type": "price_update",
-            "data": CRYPTO_PAIRS,
-            "ai_signals": ai_signals
-        })
+        await manager.broadcast(price_update_message())
         return {"status": "success", "message": "Prices updated from Binance"}
     else:
         return JSONResponse(status_code=500, content={"error": "Failed to update prices"})
@@ -266,12 +420,27 @@ async def get_settings():
 async def update_settings(settings: TradeSettings):
     global current_settings
     current_settings = settings
+    # Wakes the price pump so the new interval applies right away
+    price_scheduler.set_base_interval(settings.price_update_interval)
     return {"status": "updated", "settings": "Settings updated successfully"}
 
 @app.post("/api/trade/{pair}")
 async def execute_trade(pair: str, side: str, market_type: str = "spot"):
     if pair not in CRYPTO_PAIRS:
         return JSONResponse(status_code=404, content={"error": "Pair not found"})
+    if side.upper() not in ("BUY", "SELL"):
+        return JSONResponse(status_code=400, content={"error": "side must be BUY or SELL"})
+    
+    # Signed notional: long positions add exposure, short positions remove it
+    notional = current_settings.trade_amount if side.upper() == "BUY" else -current_settings.trade_amount
+    if current_settings.max_portfolio_var or current_settings.max_gross_exposure:
+        allowed, reason = risk_engine.check_order(
+            pair, notional,
+            max_var=current_settings.max_portfolio_var,
+            max_gross_exposure=current_settings.max_gross_exposure
+        )
+        if not allowed:
+            return JSONResponse(status_code=400, content={"error": f"Order rejected: {reason}"})
     
     current_price = CRYPTO_PAIRS[pair]["price"]
     trade_id = str(uuid.uuid4())
@@ -298,6 +467,9 @@ async def execute_trade(pair: str, side: str, market_type: str = "spot"):
     )
     
     active_trades.append(trade.dict())
+    trade_stats.record(pair, side, market_type, execution_price, trade.amount, trade.timestamp.timestamp())
+    risk_engine.add_exposure(pair, notional)
+    response_cache.invalidate("trades")
     
     # Broadcast trade execution
     await manager.broadcast({
@@ -327,8 +499,12 @@ async def emergency_sell():
                 "status": "emergency_close"
             }
             closed_trades.append(close_trade)
+            trade_stats.record(close_trade["pair"], "SELL", close_trade["market_type"], close_trade["price"],
+                               close_trade["amount"], close_trade["timestamp"].timestamp())
     
     active_trades = []  # Clear all positions
+    risk_engine.reset_exposure()
+    response_cache.invalidate("trades")
     
     await manager.broadcast({
         "type": "emergency_sell_executed",
@@ -337,14 +513,98 @@ async def emergency_sell():
     
     return {"status": "success", "closed_positions": len(closed_trades)}
 
+@app.post("/api/accounts")
+async def create_account(request: AccountCreate):
+    """Create an isolated paper-trading account"""
+    settings = request.settings.dict(exclude_none=True) if request.settings else None
+    try:
+        account_id = account_book.create_account(request.account_id, settings)
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    return {"status": "created", "account": account_book.summary(account_id)}
+
+@app.get("/api/accounts/{account_id}")
+async def get_account(account_id: str):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    return account_book.summary(account_id)
+
+@app.get("/api/accounts/{account_id}/settings")
+async def get_account_settings(account_id: str):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    return account_book.get_settings(account_id)
+
+@app.post("/api/accounts/{account_id}/settings")
+async def update_account_settings(account_id: str, settings: AccountSettings):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    return {"status": "updated", "settings": account_book.update_settings(account_id, settings.dict(exclude_none=True))}
+
+@app.post("/api/accounts/{account_id}/trade/{pair}")
+async def execute_account_trade(account_id: str, pair: str, side: str):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    if pair not in CRYPTO_PAIRS or pair not in account_book.symbol_index:
+        return JSONResponse(status_code=404, content={"error": "Pair not found"})
+    if side.upper() not in ("BUY", "SELL"):
+        return JSONResponse(status_code=400, content={"error": "side must be BUY or SELL"})
+    
+    # Simulate slight slippage
+    slippage = random.uniform(-0.001, 0.001)
+    execution_price = CRYPTO_PAIRS[pair]["price"] * (1 + slippage)
+    trade = account_book.open_position(account_id, pair, side, execution_price)
+    return {"status": "success", "trade": trade}
+
+@app.post("/api/accounts/{account_id}/close-all")
+async def close_account_positions(account_id: str):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    return {"status": "success", "closed_positions": account_book.close_all(account_id)}
+
+@app.get("/api/accounts/{account_id}/trades")
+async def get_account_trades(account_id: str, limit: int = 100):
+    if account_id not in account_book.index:
+        return JSONResponse(status_code=404, content={"error": "Account not found"})
+    if limit < 1:
+        return JSONResponse(status_code=400, content={"error": "limit must be at least 1"})
+    return {"trades": account_book.trade_history(account_id, limit)}
+
+@app.get("/api/trades/stats")
+async def get_trade_stats(pair: Optional[str] = None, side: Optional[str] = None,
+                          market_type: Optional[str] = None, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, interval: Optional[int] = None):
+    """Fill counts, volume, VWAP and buy/sell ratio, overall and by time bucket"""
+    if side and side.upper() not in ("BUY", "SELL"):
+        return JSONResponse(status_code=400, content={"error": "side must be BUY or SELL"})
+    if interval is not None and interval <= 0:
+        return JSONResponse(status_code=400, content={"error": "interval must be positive"})
+    return trade_stats.query(
+        pair=pair, side=side, market_type=market_type,
+        start=start.timestamp() if start else None,
+        end=end.timestamp() if end else None,
+        interval=interval
+    )
+
 @app.get("/api/trades")
-async def get_active_trades():
-    return {"trades": active_trades}
+async def get_active_trades(request: Request):
+    return response_cache.respond("trades", request, lambda: {"trades": active_trades})
+
+@app.get("/api/risk")
+async def get_portfolio_risk():
+    """Open exposure, one-bar portfolio VaR and correlation of held pairs"""
+    return {
+        **risk_engine.summary(),
+        "limits": {
+            "max_portfolio_var": current_settings.max_portfolio_var,
+            "max_gross_exposure": current_settings.max_gross_exposure
+        }
+    }
 
 @app.get("/api/ai-signals")
-async def get_ai_signals():
+async def get_ai_signals(request: Request):
     """Get current AI trading signals for all pairs"""
-    return {"signals": ai_signals}
+    return response_cache.respond("ai_signals", request, lambda: {"signals": ai_signals})
 
 @app.post("/api/generate-ai-signals")
 async def generate_ai_signals():
@@ -366,6 +626,8 @@ async def generate_ai_signals():
     
     # Update global signals
     ai_signals.update(generated_signals)
+    response_cache.invalidate("ai_signals", "pairs_all")
+    await persist_snapshot(CRYPTO_PAIRS, ai_signals)
     
     # Broadcast new signals
     await manager.broadcast({
@@ -375,30 +637,123 @@ async def generate_ai_signals():
     
     return {"status": "success", "signals": generated_signals}
 
+def debug_allowed(request: Request) -> bool:
+    if not DEBUG_TOKEN:
+        return False
+    # Compare raw bytes: compare_digest rejects non-ASCII str with TypeError.
+    # Starlette decodes headers as latin-1, so this recovers the bytes sent.
+    sent = request.headers.get("x-debug-token", "").encode("latin-1")
+    return hmac.compare_digest(sent, DEBUG_TOKEN.encode("utf-8"))
+
+@app.post("/api/debug/profile")
+async def run_profiler(request: Request, seconds: float = 10, interval_ms: float = 10):
+    """Sample all threads for N seconds and return collapsed stacks for a flamegraph"""
+    if not debug_allowed(request):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    if profiler_lock.locked():
+        return JSONResponse(status_code=409, content={"error": "A profile is already running"})
+    
+    seconds = min(max(seconds, 0.1), 60)
+    async with profiler_lock:
+        collapsed = await SamplingProfiler(max(interval_ms, 10) / 1000).run_for(seconds)
+    
+    filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(collapsed, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/debug/stalls")
+async def get_loop_stalls(request: Request):
+    """Recent event loop stalls with the stack that was blocking"""
+    if not debug_allowed(request):
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return {
+        "enabled": stall_detector is not None,
+        "threshold_ms": STALL_THRESHOLD_MS,
+        "stalls": list(stall_detector.stalls) if stall_detector else []
+    }
+
+@app.get("/api/stream")
+async def stream_updates(request: Request, last_event_id: Optional[str] = None):
+    """Server-Sent Events feed of the same updates pushed over /api/ws.
+
+    Reconnecting clients send Last-Event-ID (browsers do this automatically;
+    curl can pass ?last_event_id=) and receive only the events they missed.
+    """
+    if manager.streams.full():
+        return JSONResponse(status_code=503, content={"error": "Too many stream clients"})
+    resume_id = request.headers.get("last-event-id") or last_event_id
+    
+    async def event_stream():
+        # Register only once the body is being sent: a client that disconnects
+        # before that never starts this generator, so nothing would release it
+        subscriber = manager.streams.open()
+        if subscriber is None:
+            # Filled up since the check above; tell the client and have it back off
+            yield b'retry: 10000\ndata: {"type":"error","error":"Too many stream clients"}\n\n'
+            return
+        subscribed = list(CRYPTO_SYMBOLS)
+        price_scheduler.subscribe(subscribed)
+        try:
+            backlog = manager.streams.backlog(resume_id)
+            if manager.streams.last_snapshot is None:
+                # Nothing broadcast yet (e.g. just booted); start from the current book
+                backlog = [f"data: {encode_message(None, price_update_message(), manager.symbols)}\n\n".encode("utf-8")]
+            yield b"retry: 3000\n\n"
+            for frame in backlog:
+                yield frame
+            while True:
+                if subscriber.lagged and subscriber.queue.empty():
+                    # Too far behind; the client reconnects and resumes from the buffer
+                    break
+                try:
+                    yield await asyncio.wait_for(subscriber.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            manager.streams.close(subscriber)
+            price_scheduler.unsubscribe(subscribed)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @app.websocket("/api/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
+    # Clients watch the whole book until they narrow it with a subscribe message:
+    # {"type": "subscribe", "pairs": ["BTCUSDT", ...]}
+    subscribed = list(CRYPTO_SYMBOLS)
+    price_scheduler.subscribe(subscribed)
     try:
+        await manager.send(websocket, price_update_message())
+        
+        # Updates are pushed by price_pump; this loop only reads client messages
         while True:
-            # Check if we need to update from Binance
-            current_time = time.time()
-            if current_time - last_binance_update > current_settings.price_update_interval:
-                await fetch_binance_prices()
-            
-            # Broadcast current data
-            await manager.broadcast({
-                "type": "price_update",
-                "data": CRYPTO_PAIRS,
-                "ai_signals": ai_signals,
-                "update_interval": current_settings.price_update_interval
-            })
-            
-            # Wait for the configured interval
-            await asyncio.sleep(current_settings.price_update_interval)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            try:
+                request = json.loads(message.get("text") or message.get("bytes") or "")
+            except ValueError:
+                continue
+            if isinstance(request, dict) and request.get("type") == "subscribe":
+                pairs = request.get("pairs")
+                # Anything but a list of pair names is ignored
+                if not isinstance(pairs, list) or not all(isinstance(pair, str) for pair in pairs):
+                    continue
+                pairs = [pair for pair in pairs if pair in CRYPTO_SYMBOLS]
+                price_scheduler.unsubscribe(subscribed)
+                subscribed = pairs
+                price_scheduler.subscribe(subscribed)
             
     except WebSocketDisconnect:
+        pass
+    finally:
+        price_scheduler.unsubscribe(subscribed)
         manager.disconnect(websocket)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    # permessage-deflate is negotiated per client; set WS_PER_MESSAGE_DEFLATE=0 to turn it off
+    ws_deflate = os.environ.get('WS_PER_MESSAGE_DEFLATE', '1') not in ('0', 'false', 'False')
+    uvicorn.run(app, host="0.0.0.0", port=8001, ws_per_message_deflate=ws_deflate)
\ No newline at end of file
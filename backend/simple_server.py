@@ -13,13 +13,21 @@ from typing import Optional, List
 import os
 
 from contextlib import asynccontextmanager
+from snapshot import load_snapshot, persist_snapshot
+from trade_stats import TradeStats
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize data on startup"""
-    await fetch_crypto_prices()
+    snapshot = load_snapshot()
+    if snapshot and snapshot["pairs"]:
+        CRYPTO_PAIRS.update(snapshot["pairs"])
+        print(f"✅ Loaded market snapshot with {len(CRYPTO_PAIRS)} pairs (stale until refreshed)")
+    # Refresh in the background so startup does not wait on CoinGecko
+    refresh_task = asyncio.create_task(fetch_crypto_prices())
     print("🚀 Simple Binance Trader API started!")
     yield
+    refresh_task.cancel()
     print("🔥 Simple Binance Trader API stopped!")
 
 app = FastAPI(lifespan=lifespan)
@@ -40,6 +48,8 @@ CRYPTO_SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "SOLUSDT", "DOTUSD
 CRYPTO_PAIRS = {}
 last_update = 0
 active_trades = []
+# Per-fill aggregates behind /api/trades/stats; active_trades only keeps the last 20
+trade_stats = TradeStats()
 settings = {
     "trade_amount": 500,
     "take_profit": 10,
@@ -61,7 +71,8 @@ async def fetch_crypto_prices():
         }
         
         coin_ids = ",".join(coin_mapping.values())
-        response = requests.get(
+        response = await asyncio.to_thread(
+            requests.get,
             f"https://api.coingecko.com/api/v3/simple/price?ids={coin_ids}&vs_currencies=usd&include_24hr_change=true&include_24hr_vol=true", 
             timeout=10
         )
@@ -69,6 +80,11 @@ async def fetch_crypto_prices():
         if response.status_code == 200:
             price_data = response.json()
         else:
+            if CRYPTO_PAIRS:
+                print("Failed to fetch prices, keeping last known data")
+                for pair_data in CRYPTO_PAIRS.values():
+                    pair_data["stale"] = True
+                return True
             print("Failed to fetch prices, using mock data")
             return init_mock_data()
         
@@ -92,15 +108,22 @@ async def fetch_crypto_prices():
                     "volume": volume,
                     "high24h": high_24h,
                     "low24h": low_24h,
-                    "lastUpdate": datetime.now().isoformat()
+                    "lastUpdate": datetime.now().isoformat(),
+                    "stale": False
                 }
         
         last_update = time.time()
         print(f"✅ Updated prices from CoinGecko for {len(CRYPTO_PAIRS)} pairs")
+        await persist_snapshot(CRYPTO_PAIRS)
         return True
         
     except Exception as e:
         print(f"❌ Error fetching data: {str(e)}")
+        if CRYPTO_PAIRS:
+            # Keep serving the last known prices rather than mock constants
+            for pair_data in CRYPTO_PAIRS.values():
+                pair_data["stale"] = True
+            return True
         return init_mock_data()
 
 def init_mock_data():
@@ -206,6 +229,7 @@ async def execute_trade(pair: str, side: str):
     }
     
     active_trades.insert(0, trade)
+    trade_stats.record(pair, side, "spot", execution_price, trade["amount"])
     
     # Keep only last 20 trades
     if len(active_trades) > 20:
@@ -233,14 +257,31 @@ async def emergency_sell():
                 "status": "emergency_close"
             }
             closed_trades.append(close_trade)
+            trade_stats.record(close_trade["pair"], "SELL", "spot", close_trade["price"], close_trade["amount"])
     
-    # Add emergency sells to trades list
-    active_trades = closed_trades + active_trades
+    # Closed buys are gone; keeping them would close (and count) them again next time
+    active_trades = closed_trades + [trade for trade in active_trades if trade["side"] != "BUY"]
     
     await manager.broadcast({"type": "emergency_sell_executed", "closed_trades": closed_trades})
     
     return {"status": "success", "closed_positions": len(closed_trades)}
 
+@app.get("/api/trades/stats")
+async def get_trade_stats(pair: Optional[str] = None, side: Optional[str] = None,
+                          market_type: Optional[str] = None, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None, interval: Optional[int] = None):
+    """Fill counts, volume, VWAP and buy/sell ratio, overall and by time bucket"""
+    if side and side.upper() not in ("BUY", "SELL"):
+        return JSONResponse(status_code=400, content={"error": "side must be BUY or SELL"})
+    if interval is not None and interval <= 0:
+        return JSONResponse(status_code=400, content={"error": "interval must be positive"})
+    return trade_stats.query(
+        pair=pair, side=side, market_type=market_type,
+        start=start.timestamp() if start else None,
+        end=end.timestamp() if end else None,
+        interval=interval
+    )
+
 @app.get("/api/trades")
 async def get_active_trades():
     return {"trades": active_trades[:10]}  # Return last 10 trades
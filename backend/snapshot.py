@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+# Last known market state, written after every successful refresh so a
+# restarted server can answer immediately instead of waiting on upstream.
+SNAPSHOT_PATH = os.environ.get(
+    'SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'market_snapshot.json')
+)
+SNAPSHOT_VERSION = 1
+
+# Content of the last write per path, minus per-fetch timestamps
+_last_written = {}
+_write_lock = threading.Lock()
+
+
+def save_snapshot(pairs: dict, signals: Optional[dict] = None, candles: Optional[dict] = None,
+                  path: str = SNAPSHOT_PATH) -> bool:
+    """Atomically write pairs, AI signals and candles to a compact snapshot file.
+
+    Returns False without touching the file when nothing but ``lastUpdate``
+    changed since the previous write.
+    """
+    fingerprint = json.dumps(
+        [{symbol: {k: v for k, v in data.items() if k != "lastUpdate"} for symbol, data in pairs.items()},
+         signals or {}, candles or {}],
+        separators=(",", ":"), default=str
+    )
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "pairs": pairs,
+        "ai_signals": signals or {},
+        "candles": candles or {},
+    }
+    tmp_path = f"{path}.tmp"
+    with _write_lock:
+        if _last_written.get(path) == fingerprint:
+            return False
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, separators=(",", ":"), default=str)
+            os.replace(tmp_path, path)
+            _last_written[path] = fingerprint
+            return True
+        except Exception as e:
+            print(f"❌ Error saving market snapshot: {str(e)}")
+            return False
+
+
+async def persist_snapshot(pairs: dict, signals: Optional[dict] = None, candles: Optional[dict] = None,
+                           path: str = SNAPSHOT_PATH) -> bool:
+    """Copy the book on the event loop, then encode and write it in a worker thread"""
+    pairs = {symbol: dict(data) for symbol, data in pairs.items()}
+    signals = {pair: dict(signal) for pair, signal in (signals or {}).items()}
+    return await asyncio.to_thread(save_snapshot, pairs, signals, candles, path)
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Optional[dict]:
+    """Load the last snapshot written by ``save_snapshot``.
+
+    Every pair is flagged ``stale`` so clients can tell cached data from a
+    fresh upstream fetch. Returns None if there is no usable snapshot.
+    """
+    try:
+        with open(path, "rb") as f:
+            payload = json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"❌ Error loading market snapshot: {str(e)}")
+        return None
+
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    pairs = payload.get("pairs") or {}
+    for pair_data in pairs.values():
+        pair_data["stale"] = True
+
+    return {
+        "saved_at": payload.get("saved_at", 0),
+        "pairs": pairs,
+        "ai_signals": payload.get("ai_signals") or {},
+        "candles": payload.get("candles") or {},
+    }
@@ -0,0 +1,189 @@
+import math
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from column_table import ColumnTable
+
+SIDES = ("BUY", "SELL")
+
+# Upper bound on buckets returned by one query; longer ranges are coarsened
+MAX_TIMELINE_POINTS = 500
+
+BUCKET_COLUMNS = {
+    "bucket": "i8", "fills": "i8", "quantity": "f8", "volume": "f8",
+    "low": "f8", "high": "f8",
+}
+
+
+class TradeStats:
+    """Trade aggregates maintained per fill and bucketed by time.
+
+    Every (pair, side, market_type) combination has its own table of
+    ``bucket_seconds`` wide buckets holding fill count, base quantity, quote
+    volume and price range. Recording a fill touches one bucket; a query
+    binary-searches each matching table for the time range and reduces the
+    buckets in it, so its cost depends on the number of buckets and never
+    on the number of trades.
+    """
+
+    def __init__(self, bucket_seconds: int = 60):
+        self.bucket_seconds = bucket_seconds
+        self.series: Dict[Tuple[str, str, str], ColumnTable] = {}
+        self.total_fills = 0
+
+    def record(self, pair: str, side: str, market_type: str, price: float, amount: float,
+               timestamp: Optional[float] = None) -> None:
+        """Add one fill; ``amount`` is the quote notional as on TradeOrder.
+
+        Fills with a side other than BUY or SELL are ignored.
+        """
+        side = (side or "").upper()
+        # Unknown sides would get their own series and count as sells in totals
+        if not price or price <= 0 or side not in SIDES:
+            return
+        key = (pair, side, market_type or "spot")
+        table = self.series.get(key)
+        if table is None:
+            table = self.series[key] = ColumnTable(BUCKET_COLUMNS, capacity=64)
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket = int(timestamp // self.bucket_seconds)
+        quantity = amount / price
+
+        buckets = table.columns["bucket"]
+        row = table.size - 1
+        if row < 0 or buckets[row] < bucket:
+            table.append(bucket=bucket, fills=1, quantity=quantity, volume=amount, low=price, high=price)
+        else:
+            if buckets[row] != bucket:
+                # Late fill for an older bucket
+                row = int(np.searchsorted(table["bucket"], bucket))
+                if buckets[row] != bucket:
+                    table.insert(row, bucket=bucket, low=price, high=price)
+            columns = table.columns
+            columns["fills"][row] += 1
+            columns["quantity"][row] += quantity
+            columns["volume"][row] += amount
+            if price < columns["low"][row]:
+                columns["low"][row] = price
+            if price > columns["high"][row]:
+                columns["high"][row] = price
+        self.total_fills += 1
+
+    def query(self, pair: Optional[str] = None, side: Optional[str] = None,
+              market_type: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, interval: Optional[int] = None) -> dict:
+        """Totals, per-pair breakdown and a bucketed timeline for matching fills.
+
+        ``start`` / ``end`` are epoch seconds (end exclusive) and are aligned
+        to bucket boundaries. ``interval`` is the timeline step in seconds;
+        it is rounded up to a whole number of buckets and widened so at most
+        ``MAX_TIMELINE_POINTS`` buckets are returned.
+        """
+        side = side.upper() if side else None
+        first = None if start is None else math.floor(start / self.bucket_seconds)
+        last = None if end is None else math.ceil(end / self.bucket_seconds)
+
+        # Bucket-row range of each matching series inside [first, last)
+        selected = []
+        for (series_pair, series_side, series_market), table in self.series.items():
+            if (pair and series_pair != pair) or (side and series_side != side) \
+                    or (market_type and series_market != market_type):
+                continue
+            buckets = table["bucket"]
+            lo = 0 if first is None else int(np.searchsorted(buckets, first))
+            hi = len(buckets) if last is None else int(np.searchsorted(buckets, last))
+            if hi > lo:
+                selected.append((series_pair, series_side, table, lo, hi))
+
+        pairs = {}
+        totals = _empty_stats()
+        for series_pair, series_side, table, lo, hi in selected:
+            stats = pairs.setdefault(series_pair, _empty_stats())
+            fills = int(table["fills"][lo:hi].sum())
+            volume = float(table["volume"][lo:hi].sum())
+            quantity = float(table["quantity"][lo:hi].sum())
+            low = float(table["low"][lo:hi].min())
+            high = float(table["high"][lo:hi].max())
+            for target in (stats, totals):
+                target["fills"] += fills
+                target["volume"] += volume
+                target["quantity"] += quantity
+                target["buy_volume" if series_side == "BUY" else "sell_volume"] += volume
+                target["low"] = low if target["low"] is None else min(target["low"], low)
+                target["high"] = high if target["high"] is None else max(target["high"], high)
+        for stats in pairs.values():
+            _finish(stats, with_price=True)
+        # Prices of different pairs do not mix, so totals only have them for one pair
+        _finish(totals, with_price=len(pairs) == 1)
+
+        return {
+            "filters": {
+                "pair": pair, "side": side, "market_type": market_type,
+                "start": _isoformat(first, self.bucket_seconds),
+                "end": _isoformat(last, self.bucket_seconds),
+            },
+            "totals": totals,
+            "pairs": pairs,
+            **self._timeline(selected, first, last, interval, with_price=len(pairs) == 1),
+        }
+
+    def _timeline(self, selected, first, last, interval, with_price: bool) -> dict:
+        width = self.bucket_seconds
+        if not selected:
+            return {"interval": interval or width, "buckets": []}
+        if first is None:
+            first = min(int(table["bucket"][lo]) for _, _, table, lo, _ in selected)
+        if last is None:
+            last = max(int(table["bucket"][hi - 1]) for _, _, table, _, hi in selected) + 1
+        step = max(math.ceil((interval or width) / width), math.ceil((last - first) / MAX_TIMELINE_POINTS), 1)
+        # Align to whole steps since the epoch so hourly buckets start on the hour
+        first -= first % step
+        points = math.ceil((last - first) / step)
+
+        fills = np.zeros(points, dtype=np.int64)
+        volume = np.zeros(points)
+        quantity = np.zeros(points)
+        buy_volume = np.zeros(points)
+        for _, series_side, table, lo, hi in selected:
+            slot = (table["bucket"][lo:hi] - first) // step
+            fills += np.bincount(slot, weights=table["fills"][lo:hi], minlength=points).astype(np.int64)
+            series_volume = np.bincount(slot, weights=table["volume"][lo:hi], minlength=points)
+            volume += series_volume
+            quantity += np.bincount(slot, weights=table["quantity"][lo:hi], minlength=points)
+            if series_side == "BUY":
+                buy_volume += series_volume
+
+        buckets = []
+        for i in np.flatnonzero(fills):
+            bucket = {
+                "start": _isoformat(first + i * step, width),
+                "fills": int(fills[i]),
+                "volume": float(volume[i]),
+                "buy_volume": float(buy_volume[i]),
+                "sell_volume": float(volume[i] - buy_volume[i]),
+            }
+            if with_price:
+                bucket["vwap"] = float(volume[i] / quantity[i]) if quantity[i] else None
+            buckets.append(bucket)
+        return {"interval": step * width, "buckets": buckets}
+
+
+def _empty_stats() -> dict:
+    return {"fills": 0, "volume": 0.0, "quantity": 0.0, "buy_volume": 0.0, "sell_volume": 0.0,
+            "low": None, "high": None}
+
+
+def _finish(stats: dict, with_price: bool) -> None:
+    stats["buy_sell_ratio"] = stats["buy_volume"] / stats["sell_volume"] if stats["sell_volume"] else None
+    if with_price:
+        stats["vwap"] = stats["volume"] / stats["quantity"] if stats["quantity"] else None
+    else:
+        # Base quantities of different pairs cannot be added up either
+        del stats["quantity"], stats["low"], stats["high"]
+
+
+def _isoformat(bucket: Optional[int], width: int) -> Optional[str]:
+    return None if bucket is None else datetime.fromtimestamp(bucket * width).isoformat()
@@ -0,0 +1,185 @@
+import json
+import math
+import struct
+import time
+from datetime import datetime
+from typing import List, Optional, Union
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, clients just can't negotiate it
+    msgpack = None
+
+# WebSocket subprotocols a client may offer in Sec-WebSocket-Protocol.
+# Clients that offer nothing (e.g. simple_frontend.html) get plain JSON.
+SUBPROTOCOL_JSON = "binance.json"
+SUBPROTOCOL_MSGPACK = "binance.msgpack.v1"
+SUBPROTOCOL_BINARY = "binance.bin.v1"
+
+# binance.bin.v1 frame layout (little endian):
+#   header  <BBHQ   version, frame type, entry count, server time (ms)
+#   FRAME_SYMBOLS   entries of <HB + key + B + display symbol
+#   FRAME_PRICES    entries of PRICE_ENTRY, then <I length + compact JSON of
+#                   the remaining message fields (ai_signals, update_interval)
+# Every other message type is sent to binary clients as a JSON text frame.
+BINARY_VERSION = 1
+FRAME_SYMBOLS = 0
+FRAME_PRICES = 1
+HEADER = struct.Struct("<BBHQ")
+# symbol id, price, change, volume, high24h, low24h, flags
+PRICE_ENTRY = struct.Struct("<HqiQqqB")
+TRAILER = struct.Struct("<I")
+PRICE_SCALE = 10 ** 8
+CHANGE_SCALE = 10 ** 4
+FLAG_STALE = 1
+# Representable ranges of the PRICE_ENTRY fields
+INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+UINT64_RANGE = (0, 2 ** 64 - 1)
+
+
+def available_subprotocols() -> List[str]:
+    """Subprotocols this server can speak, in order of preference"""
+    protocols = [SUBPROTOCOL_BINARY, SUBPROTOCOL_JSON]
+    if msgpack is not None:
+        protocols.insert(1, SUBPROTOCOL_MSGPACK)
+    return protocols
+
+
+def negotiate(offered: List[str]) -> Optional[str]:
+    """Pick the first offered subprotocol we support; None means default JSON"""
+    supported = available_subprotocols()
+    for protocol in offered:
+        if protocol in supported:
+            return protocol
+    return None
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_json(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"), default=_json_default)
+
+
+class SymbolTable:
+    """Stable small-integer IDs for pair keys, shared by all binary clients"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = {}
+        self.version = 0
+        self._frame = None
+
+    def sync(self, pairs: dict) -> None:
+        for key, pair_data in pairs.items():
+            if key not in self.ids:
+                self.ids[key] = len(self.ids)
+                self.names[key] = pair_data.get("symbol", key)
+                self.version += 1
+                self._frame = None
+
+    def frame(self) -> bytes:
+        """Encoded FRAME_SYMBOLS frame for the current table, cached per version"""
+        if self._frame is None:
+            parts = [HEADER.pack(BINARY_VERSION, FRAME_SYMBOLS, len(self.ids), int(time.time() * 1000))]
+            for key, symbol_id in self.ids.items():
+                raw_key = key.encode("utf-8")
+                raw_name = self.names[key].encode("utf-8")
+                parts.append(struct.pack("<HB", symbol_id, len(raw_key)))
+                parts.append(raw_key)
+                parts.append(struct.pack("<B", len(raw_name)))
+                parts.append(raw_name)
+            self._frame = b"".join(parts)
+        return self._frame
+
+
+def _fixed(value, scale: int, bounds) -> int:
+    """Scale to a fixed-point integer clamped to the field's range.
+
+    An out-of-range value would make struct.pack fail for the whole frame;
+    missing and non-finite values are sent as 0.
+    """
+    value = float(value or 0)
+    if not math.isfinite(value):
+        return 0
+    low, high = bounds
+    return min(max(round(value * scale), low), high)
+
+
+def encode_binary_prices(data: dict, symbols: SymbolTable) -> bytes:
+    """Encode a price_update message as a fixed-layout FRAME_PRICES frame"""
+    pairs = data.get("data", {})
+    symbols.sync(pairs)
+    ids = symbols.ids
+    pack = PRICE_ENTRY.pack
+    parts = [HEADER.pack(BINARY_VERSION, FRAME_PRICES, len(pairs), int(time.time() * 1000))]
+    for key, pair_data in pairs.items():
+        parts.append(pack(
+            ids[key],
+            _fixed(pair_data.get("price"), PRICE_SCALE, INT64_RANGE),
+            _fixed(pair_data.get("change"), CHANGE_SCALE, INT32_RANGE),
+            _fixed(pair_data.get("volume"), 1, UINT64_RANGE),
+            _fixed(pair_data.get("high24h"), PRICE_SCALE, INT64_RANGE),
+            _fixed(pair_data.get("low24h"), PRICE_SCALE, INT64_RANGE),
+            FLAG_STALE if pair_data.get("stale") else 0,
+        ))
+    extra = {k: v for k, v in data.items() if k not in ("type", "data")}
+    raw_extra = encode_json(extra).encode("utf-8") if extra else b""
+    parts.append(TRAILER.pack(len(raw_extra)))
+    parts.append(raw_extra)
+    return b"".join(parts)
+
+
+def decode_binary_frame(frame: bytes, names: Optional[dict] = None) -> dict:
+    """Reference decoder for binance.bin.v1 frames, mirrors what clients do"""
+    version, frame_type, count, server_time = HEADER.unpack_from(frame, 0)
+    offset = HEADER.size
+    if frame_type == FRAME_SYMBOLS:
+        table = {}
+        for _ in range(count):
+            symbol_id, key_len = struct.unpack_from("<HB", frame, offset)
+            offset += 3
+            key = frame[offset:offset + key_len].decode("utf-8")
+            offset += key_len
+            name_len = frame[offset]
+            offset += 1
+            table[symbol_id] = (key, frame[offset:offset + name_len].decode("utf-8"))
+            offset += name_len
+        return {"type": "symbols", "symbols": table, "time": server_time}
+
+    names = names or {}
+    pairs = {}
+    for symbol_id, price, change, volume, high, low, flags in PRICE_ENTRY.iter_unpack(
+            frame[offset:offset + count * PRICE_ENTRY.size]):
+        key, display = names.get(symbol_id, (str(symbol_id), str(symbol_id)))
+        pairs[key] = {
+            "symbol": display,
+            "price": price / PRICE_SCALE,
+            "change": change / CHANGE_SCALE,
+            "volume": volume,
+            "high24h": high / PRICE_SCALE,
+            "low24h": low / PRICE_SCALE,
+            "stale": bool(flags & FLAG_STALE),
+        }
+    offset += count * PRICE_ENTRY.size
+    (extra_len,) = TRAILER.unpack_from(frame, offset)
+    offset += TRAILER.size
+    message = json.loads(frame[offset:offset + extra_len]) if extra_len else {}
+    message.update({"type": "price_update", "data": pairs, "time": server_time})
+    return message
+
+
+def encode_message(protocol: Optional[str], data: dict, symbols: SymbolTable) -> Union[str, bytes]:
+    """Encode one broadcast message for a negotiated subprotocol.
+
+    Returns str for text frames and bytes for binary frames.
+    """
+    if protocol == SUBPROTOCOL_MSGPACK:
+        return msgpack.packb(data, default=_json_default)
+    if protocol == SUBPROTOCOL_BINARY and data.get("type") == "price_update":
+        return encode_binary_prices(data, symbols)
+    return encode_json(data)
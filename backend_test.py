@@ -1,6 +1,8 @@
 import requests
 import sys
 import json
+import time
+import threading
 from datetime import datetime
 
 class BinanceTradingAPITester:
@@ -123,6 +125,79 @@ class BinanceTradingAPITester:
         }
         return self.run_test("Update AI Settings", "POST", "api/settings", 200, data=ai_settings)
 
+    def collect_broadcast_gaps(self, ws, count):
+        """Return the gaps in seconds between consecutive price_update broadcasts"""
+        arrivals = []
+        while len(arrivals) < count + 1:
+            message = json.loads(ws.recv(timeout=30))
+            if message.get("type") == "price_update":
+                arrivals.append(time.perf_counter())
+        return [b - a for a, b in zip(arrivals, arrivals[1:])]
+
+    def test_admission_under_flood(self, flood_threads=16, samples=5, interval=1):
+        """Flood the trade endpoint and check price broadcasts keep their cadence.
+
+        The WebSocket client watches every pair, which pins all of them to the
+        scheduler's base-interval tier, and the interval is set to ``interval``
+        for the duration of the test so the expected cadence is known.
+        """
+        from websockets.sync.client import connect
+
+        self.tests_run += 1
+        print(f"\n🔍 Testing Admission Control Under Flood...")
+        ws_url = self.base_url.replace('https://', 'wss://').replace('http://', 'ws://')
+        statuses = {}
+        stop = threading.Event()
+
+        settings = requests.get(f"{self.base_url}/api/settings").json()
+        if settings.get("openai_api_key") == "***HIDDEN***":
+            del settings["openai_api_key"]
+        requests.post(f"{self.base_url}/api/settings", json={**settings, "price_update_interval": interval})
+
+        def flood():
+            session = requests.Session()
+            while not stop.is_set():
+                try:
+                    response = session.post(f"{self.base_url}/api/trade/BTCUSDT", params={"side": "BUY"})
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                except Exception:
+                    statuses["error"] = statuses.get("error", 0) + 1
+
+        try:
+            with connect(f"{ws_url}/api/ws") as ws:
+                # The settings change and the new subscription wake the pump early; skip that
+                self.collect_broadcast_gaps(ws, 1)
+                baseline = self.collect_broadcast_gaps(ws, samples)
+                threads = [threading.Thread(target=flood, daemon=True) for _ in range(flood_threads)]
+                for thread in threads:
+                    thread.start()
+                try:
+                    flooded = self.collect_broadcast_gaps(ws, samples)
+                finally:
+                    stop.set()
+                    for thread in threads:
+                        thread.join()
+        except Exception as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return False, {}
+        finally:
+            requests.post(f"{self.base_url}/api/settings", json=settings)
+
+        baseline_gap = sum(baseline) / len(baseline)
+        flooded_gap = sum(flooded) / len(flooded)
+        print(f"   Broadcast gap: {baseline_gap:.3f}s idle, {flooded_gap:.3f}s (max {max(flooded):.3f}s) under flood")
+        print(f"   Trade responses during flood: {statuses}")
+
+        rejected = statuses.get(429, 0) + statuses.get(503, 0)
+        # Allow 20% drift from the configured cadence while the order endpoint is flooded
+        success = rejected > 0 and flooded_gap <= max(baseline_gap, interval) * 1.2
+        if success:
+            self.tests_passed += 1
+            print(f"✅ Passed - {rejected} requests rejected, broadcast cadence held")
+        else:
+            print(f"❌ Failed - {rejected} requests rejected, broadcast cadence drifted")
+        return success, {"baseline": baseline, "flooded": flooded, "statuses": statuses}
+
 def main():
     print("🚀 Starting Binance Trading API Tests")
     print("=" * 50)
@@ -157,6 +232,9 @@ def main():
     tester.test_ai_settings_update()
     tester.test_generate_ai_signals_without_key()  # Should fail without proper API key
     
+    # Load: flooding orders must not starve the price broadcast
+    tester.test_admission_under_flood()
+    
     # Print final results
     print("\n" + "=" * 50)
     print(f"📊 Final Results: {tester.tests_passed}/{tester.tests_run} tests passed")
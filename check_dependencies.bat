@@ -11,6 +11,11 @@ echo Checking Python...
 python --version >nul 2>&1
 if %errorlevel% equ 0 (
     for /f "tokens=*" %%i in ('python --version 2^>^&1') do echo ✓ %%i
+    python -c "import sys; sys.exit(sys.version_info < (3, 9))" >nul 2>&1
+    if errorlevel 1 (
+        echo ✗ Python 3.9 or newer is required
+        set "all_ok=0"
+    )
     
     REM Check pip
     pip --version >nul 2>&1
@@ -120,7 +125,7 @@ if "%all_ok%"=="1" (
     echo ====================================
     echo.
     echo Please install missing dependencies:
-    echo   Python 3.8+: https://python.org
+    echo   Python 3.9+: https://python.org
     echo   Node.js 16+: https://nodejs.org
     echo.
     echo Then run setup_windows.bat
@@ -8,12 +8,21 @@ REM Check if Python is installed
 python --version >nul 2>&1
 if %errorlevel% neq 0 (
     echo ERROR: Python is not installed or not in PATH
-    echo Please install Python 3.8+ from https://python.org
+    echo Please install Python 3.9+ from https://python.org
     echo Make sure to check "Add Python to PATH" during installation
     pause
     exit /b 1
 )
 
+REM asyncio.to_thread and numpy 1.26 need Python 3.9 or newer
+python -c "import sys; sys.exit(sys.version_info < (3, 9))" >nul 2>&1
+if errorlevel 1 (
+    echo ERROR: Python 3.9 or newer is required
+    echo Please install Python 3.9+ from https://python.org
+    pause
+    exit /b 1
+)
+
 REM Check if Node.js is installed
 node --version >nul 2>&1
 if %errorlevel% neq 0 (
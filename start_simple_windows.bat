@@ -9,13 +9,23 @@ REM Check if Python is installed
 python --version >nul 2>&1
 if errorlevel 1 (
     echo ❌ Python is not installed or not in PATH
-    echo Please install Python 3.8+ from https://python.org
+    echo Please install Python 3.9+ from https://python.org
     echo Make sure to check "Add Python to PATH" during installation
     echo.
     pause
     exit /b 1
 )
 
+REM asyncio.to_thread and numpy 1.26 need Python 3.9 or newer
+python -c "import sys; sys.exit(sys.version_info < (3, 9))" >nul 2>&1
+if errorlevel 1 (
+    echo ❌ Python 3.9 or newer is required
+    echo Please install Python 3.9+ from https://python.org
+    echo.
+    pause
+    exit /b 1
+)
+
 echo ✅ Python found: 
 python --version
 echo.
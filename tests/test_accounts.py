@@ -0,0 +1,89 @@
+import pytest
+
+from accounts import AccountBook
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT"]
+
+
+def make_book(**kwargs):
+    book = AccountBook(SYMBOLS, capacity=4, **kwargs)
+    # trade_amount 1000 at price 100 -> quantity 10; TP +10 %, SL -5 %
+    for account_id in ("a", "b", "c"):
+        book.create_account(account_id, {"trade_amount": 1000, "take_profit": 10, "stop_loss": 5})
+    book.on_tick({"BTCUSDT": 100.0, "ETHUSDT": 50.0}, timestamp=1.0)
+    return book
+
+
+def test_take_profit_and_stop_loss_close_with_hand_computed_pnl():
+    book = make_book()
+    book.open_position("a", "BTCUSDT", "BUY", 100.0, timestamp=2.0)   # TP 110, SL 95
+    book.open_position("b", "BTCUSDT", "SELL", 100.0, timestamp=2.0)  # TP 90, SL 105
+    book.open_position("c", "ETHUSDT", "BUY", 50.0, timestamp=2.0)    # qty 20, TP 55, SL 47.5
+
+    # BTC at 111: a's long takes profit (+11 * 10), b's short is stopped (-11 * 10)
+    assert book.on_tick({"BTCUSDT": 111.0}, timestamp=3.0) == 2
+    assert book.summary("a")["realized_pnl"] == pytest.approx(110.0)
+    assert book.summary("b")["realized_pnl"] == pytest.approx(-110.0)
+    assert [t["status"] for t in book.trade_history("a")] == ["take_profit", "filled"]
+    assert [t["status"] for t in book.trade_history("b")] == ["stop_loss", "filled"]
+
+    # c is still open; unrealized (52 - 50) * 20 = 40
+    assert book.on_tick({"ETHUSDT": 52.0}, timestamp=4.0) == 0
+    summary = book.summary("c")
+    assert summary["unrealized_pnl"] == pytest.approx(40.0)
+    assert book.unrealized_pnl()[book.index["c"]] == pytest.approx(40.0)
+
+    # ETH at 47 crosses c's stop: (47 - 50) * 20 = -60
+    assert book.on_tick({"ETHUSDT": 47.0}, timestamp=5.0) == 1
+    assert book.summary("c")["realized_pnl"] == pytest.approx(-60.0)
+    assert book.summary("c")["positions"] == []
+
+
+def test_close_all_only_touches_one_account():
+    book = make_book()
+    book.open_position("a", "BTCUSDT", "BUY", 100.0)
+    book.open_position("a", "ETHUSDT", "SELL", 50.0)
+    book.open_position("b", "BTCUSDT", "BUY", 100.0)
+    book.on_tick({"BTCUSDT": 104.0, "ETHUSDT": 49.0})
+
+    assert book.close_all("a") == 2
+    # long BTC (104 - 100) * 10 = 40; short ETH (50 - 49) * 20 = 20
+    assert book.summary("a")["realized_pnl"] == pytest.approx(60.0)
+    assert book.summary("a")["positions"] == []
+    assert len(book.summary("b")["positions"]) == 1
+    assert book.summary("b")["unrealized_pnl"] == pytest.approx(40.0)
+
+
+def test_compaction_keeps_open_positions_intact():
+    book = make_book()
+    for i in range(1500):
+        book.open_position("abc"[i % 3], "BTCUSDT", "BUY" if i % 2 else "SELL", 100.0)
+    book.open_position("a", "ETHUSDT", "BUY", 50.0)
+    # Every BTC position hits TP or SL; only the ETH long survives compaction
+    book.on_tick({"BTCUSDT": 120.0})
+    assert book.positions.size == 1
+    assert book.summary("a")["positions"][0]["pair"] == "ETHUSDT"
+    # 750 longs at +200 and 750 shorts at -200 spread evenly over the accounts
+    total = sum(book.summary(account_id)["realized_pnl"] for account_id in "abc")
+    assert total == pytest.approx(0.0)
+
+
+def test_history_is_per_account_newest_first_and_capped():
+    book = make_book(max_history=8)
+    for i in range(12):
+        book.open_position("ab"[i % 2], "BTCUSDT", "BUY", 100.0 + i, timestamp=10.0 + i)
+    prices = [t["price"] for t in book.trade_history("a", limit=3)]
+    assert prices == [110.0, 108.0, 106.0]
+    # 12 fills exceed 8 + 8 // 4, so the oldest were trimmed back to 8
+    assert book.history.size <= 10
+    assert [t["price"] for t in book.trade_history("b", limit=100)][-1] >= 103.0
+    assert book.trade_history("c") == []
+
+
+def test_invalid_side_and_limit_are_rejected():
+    book = make_book()
+    with pytest.raises(ValueError):
+        book.open_position("a", "BTCUSDT", "foo", 100.0)
+    assert book.positions.size == 0
+    with pytest.raises(ValueError):
+        book.trade_history("a", limit=0)
@@ -0,0 +1,23 @@
+import asyncio
+import time
+
+from diagnostics import StallDetector
+
+
+def test_stall_records_full_blocked_time():
+    detector = StallDetector(threshold=0.05)
+
+    async def run():
+        detector.start()
+        await asyncio.sleep(0.1)
+        time.sleep(0.6)
+        # Let the heartbeat move and the watchdog see it
+        await asyncio.sleep(0.2)
+        detector.stop()
+
+    asyncio.run(run())
+    assert len(detector.stalls) == 1
+    stall = detector.stalls[0]
+    assert stall["resolved"] is True
+    assert 550 <= stall["blocked_ms"] < 900
+    assert "test_stall_records_full_blocked_time" in stall["stack"]
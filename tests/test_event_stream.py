@@ -0,0 +1,63 @@
+from event_stream import EventStreamHub
+
+
+def event_ids(frames):
+    return [int(frame.split(b"\n", 1)[0].rsplit(b"-", 1)[1]) for frame in frames]
+
+
+def make_hub(**kwargs):
+    hub = EventStreamHub(**kwargs)
+    # 1 snapshot, 2 signal, 3 snapshot, 4 signal, 5 signal
+    for i, snapshot in enumerate((True, False, True, False, False), start=1):
+        hub.publish(f'{{"n":{i}}}', snapshot=snapshot)
+    return hub
+
+
+def test_resume_inside_window_keeps_only_newest_snapshot():
+    hub = make_hub()
+    assert event_ids(hub.backlog(f"{hub.boot_id}-1")) == [2, 3, 4, 5]
+    # Snapshot 1 is superseded by 3 and left out
+    assert event_ids(hub.backlog(f"{hub.boot_id}-0")) == [2, 3, 4, 5]
+    assert event_ids(hub.backlog(f"{hub.boot_id}-3")) == [4, 5]
+    assert hub.backlog(f"{hub.boot_id}-5") == []
+
+
+def test_unknown_or_foreign_ids_restart_from_latest_snapshot():
+    hub = make_hub()
+    for last_event_id in (None, "garbage", f"{hub.boot_id}-99", "deadbeef-4", "4"):
+        assert event_ids(hub.backlog(last_event_id)) == [3, 4, 5]
+
+
+def test_resume_outside_window_restarts_from_snapshot():
+    hub = make_hub(replay_size=2)
+    assert [event_id for event_id, _, _ in hub.replay] == [4, 5]
+    # Event 2 fell out of the buffer, so the client gets the snapshot again
+    assert event_ids(hub.backlog(f"{hub.boot_id}-2")) == [3, 4, 5]
+    assert event_ids(hub.backlog(f"{hub.boot_id}-3")) == [4, 5]
+
+
+def test_replay_is_bounded_by_bytes():
+    hub = EventStreamHub(replay_bytes=300)
+    for i in range(20):
+        hub.publish('{"pad":"' + "x" * 50 + f'","n":{i}}}')
+    assert hub.replay_nbytes <= 300
+    assert hub.replay_nbytes == sum(len(frame) for _, frame, _ in hub.replay)
+    assert hub.replay[-1][0] == 20
+    # A single frame larger than the limit is still kept
+    hub.publish('"' + "y" * 1000 + '"')
+    assert len(hub.replay) == 1
+
+
+def test_lagged_subscriber_is_dropped():
+    hub = EventStreamHub(queue_size=2, max_streams=2)
+    slow = hub.open()
+    fast = hub.open()
+    assert hub.full() and hub.open() is None
+    for i in range(3):
+        hub.publish(f'{{"n":{i}}}')
+        if not fast.queue.empty():
+            fast.queue.get_nowait()
+    assert slow.lagged and slow not in hub.subscribers
+    assert not fast.lagged and fast in hub.subscribers
+    hub.close(fast)
+    assert not hub.full()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from price_sources import LocalFeedSource, MultiSourceFetcher, PriceSource, StubSource
+
+PRICES = {"BTCUSDT": 50000.0, "ETHUSDT": 3000.0}
+
+
+class ScriptedSource(PriceSource):
+    """Fixed quotes with a scripted latency per call"""
+
+    def __init__(self, name, quotes, delays=()):
+        self.name = name
+        self.quotes = quotes
+        self.delays = deque(delays)
+        self.calls = 0
+
+    async def fetch(self, symbols):
+        self.calls += 1
+        await asyncio.sleep(self.delays.popleft() if self.delays else 0.001)
+        return {symbol: dict(self.quotes[symbol]) for symbol in symbols if symbol in self.quotes}
+
+
+def quote(price, volume=0.0, high=None, low=None):
+    return {"price": price, "change": 1.0, "volume": volume,
+            "high24h": high or price, "low24h": low or price}
+
+
+def test_median_rejects_outlier():
+    fetcher = MultiSourceFetcher([
+        StubSource("a", PRICES, delay=0.01),
+        StubSource("b", PRICES, delay=0.02),
+        StubSource("bad", PRICES, delay=0.03, skew=0.5),
+    ])
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT"]))
+    assert quotes["BTCUSDT"]["price"] == PRICES["BTCUSDT"]
+    # The rejected outlier did not agree on the price
+    assert quotes["BTCUSDT"]["sources"] == ["a", "b"]
+    assert errors == {}
+
+
+def test_two_sources_never_average():
+    fetcher = MultiSourceFetcher([
+        StubSource("primary", PRICES, delay=0.01),
+        StubSource("secondary", PRICES, delay=0.01, skew=0.1),
+    ])
+    quotes, _ = asyncio.run(fetcher.fetch(["BTCUSDT"]))
+    assert quotes["BTCUSDT"]["price"] == PRICES["BTCUSDT"]
+
+
+def test_two_sources_do_not_wait_for_the_slower_one():
+    fetcher = MultiSourceFetcher([
+        StubSource("fast", PRICES, delay=0.01),
+        StubSource("slow", PRICES, delay=0.5),
+    ], grace=0.02)
+    assert fetcher.quorum == 1
+    started = time.perf_counter()
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT"]))
+    assert time.perf_counter() - started < 0.3
+    assert quotes["BTCUSDT"]["sources"] == ["fast"]
+    assert "slow" in errors
+    # Three or more sources still need a majority
+    assert MultiSourceFetcher([StubSource(name, PRICES) for name in "abc"]).quorum == 2
+
+
+def test_local_feed_values_are_numbers(tmp_path):
+    path = tmp_path / "feed.json"
+    path.write_text(json.dumps({
+        "BTCUSDT": {"price": "50000.5", "change": "-1.25", "volume": None, "high24h": "51000"},
+        "ETHUSDT": {"price": 0},
+    }))
+    quotes = asyncio.run(LocalFeedSource(str(path)).fetch(["BTCUSDT", "ETHUSDT"]))
+    assert quotes == {"BTCUSDT": {"price": 50000.5, "change": -1.25, "volume": 0.0,
+                                  "high24h": 51000.0, "low24h": 0.0}}
+
+
+def test_non_price_fields_come_from_priority_source():
+    fetcher = MultiSourceFetcher([
+        ScriptedSource("exchange", {"BTCUSDT": quote(100.0, volume=5e6, high=105.0, low=95.0)}),
+        ScriptedSource("aggregator", {"BTCUSDT": quote(101.0, volume=9e9, high=103.0, low=99.0)}),
+        ScriptedSource("feed", {"BTCUSDT": quote(102.0, volume=1.0)}),
+    ])
+    merged = asyncio.run(fetcher.fetch(["BTCUSDT"]))[0]["BTCUSDT"]
+    assert merged["price"] == 101.0
+    assert (merged["volume"], merged["high24h"], merged["low24h"]) == (5e6, 105.0, 95.0)
+
+
+def test_grace_period_waits_for_slower_source():
+    sources = lambda: [
+        StubSource("a", PRICES, delay=0.01),
+        StubSource("b", PRICES, delay=0.01),
+        StubSource("slow", PRICES, delay=0.1),
+    ]
+    quotes, errors = asyncio.run(MultiSourceFetcher(sources(), grace=0.5).fetch(["BTCUSDT"]))
+    assert quotes["BTCUSDT"]["sources"] == ["a", "b", "slow"]
+    assert errors == {}
+
+    started = time.perf_counter()
+    quotes, errors = asyncio.run(MultiSourceFetcher(sources(), grace=0.02).fetch(["BTCUSDT"]))
+    assert time.perf_counter() - started < 0.09
+    assert quotes["BTCUSDT"]["sources"] == ["a", "b"]
+    assert "slow" in errors
+
+
+def test_failed_source_is_reported_and_skipped():
+    fetcher = MultiSourceFetcher([
+        StubSource("down", PRICES, delay=0.01, failure_rate=1.0),
+        StubSource("up", PRICES, delay=0.02),
+    ], quorum=1)
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT", "ETHUSDT"]))
+    assert "injected failure" in errors["down"]
+    assert quotes["ETHUSDT"]["sources"] == ["up"]
+
+
+def test_symbols_no_source_answered_are_left_out():
+    # fetch_binance_prices keeps the previous value of a missing symbol and flags it stale
+    fetcher = MultiSourceFetcher([
+        StubSource("a", {"BTCUSDT": 1.0}, delay=0.01),
+        StubSource("down", PRICES, delay=0.01, failure_rate=1.0),
+    ])
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT", "ETHUSDT"]))
+    assert set(quotes) == {"BTCUSDT"}
+    assert "down" in errors
+
+    fetcher = MultiSourceFetcher([StubSource("down", PRICES, failure_rate=1.0)])
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT"]))
+    assert quotes == {} and "down" in errors
+
+
+def test_timeout_returns_without_slow_source():
+    fetcher = MultiSourceFetcher([StubSource("stuck", PRICES, delay=5)], timeout=0.05)
+    started = time.perf_counter()
+    quotes, errors = asyncio.run(fetcher.fetch(["BTCUSDT"]))
+    assert time.perf_counter() - started < 1
+    assert quotes == {} and "stuck" in errors
+
+
+def test_hedge_covers_slow_primary():
+    # 10 fast calls warm the latency window; the 11th stalls and its hedge answers
+    source = ScriptedSource("binance", {"BTCUSDT": quote(100.0)}, delays=[0.005] * 10 + [2.0, 0.005])
+    fetcher = MultiSourceFetcher([source], min_samples=10)
+
+    async def run():
+        for _ in range(10):
+            await fetcher.fetch(["BTCUSDT"])
+        started = time.perf_counter()
+        quotes, _ = await fetcher.fetch(["BTCUSDT"])
+        return quotes, time.perf_counter() - started
+
+    quotes, elapsed = asyncio.run(run())
+    assert quotes["BTCUSDT"]["price"] == 100.0
+    assert fetcher.hedges_sent == 1
+    assert source.calls == 12
+    assert elapsed < 0.5
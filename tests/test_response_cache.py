@@ -0,0 +1,70 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import response_cache as response_cache_module
+from response_cache import ResponseCache
+
+LARGE = {"pairs": {f"PAIR{i}": {"price": i * 1.5, "symbol": f"P{i}/USDT"} for i in range(100)}}
+SMALL = {"ok": True}
+
+
+def make_client():
+    cache = ResponseCache()
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large(request: Request):
+        return cache.respond("large", request, lambda: LARGE)
+
+    @app.get("/small")
+    async def small(request: Request):
+        return cache.respond("small", request, lambda: SMALL)
+
+    return cache, TestClient(app)
+
+
+def get(client, path, accept_encoding="identity", **headers):
+    return client.get(path, headers={"Accept-Encoding": accept_encoding, **headers})
+
+
+def test_each_coding_has_its_own_etag():
+    _, client = make_client()
+    plain = get(client, "/large")
+    gzipped = get(client, "/large", "gzip")
+    assert "Content-Encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert plain.headers["ETag"] != gzipped.headers["ETag"]
+    assert gzipped.headers["ETag"].endswith('-gzip"')
+    assert gzipped.json() == plain.json() == LARGE
+    if response_cache_module.brotli is not None:
+        assert get(client, "/large", "gzip, br").headers["ETag"].endswith('-br"')
+
+
+def test_if_none_match_accepts_weak_wildcard_and_other_codings():
+    cache, client = make_client()
+    etag = get(client, "/large", "gzip").headers["ETag"]
+
+    assert get(client, "/large", "gzip", **{"If-None-Match": etag}).status_code == 304
+    assert get(client, "/large", "gzip", **{"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert get(client, "/large", **{"If-None-Match": "*"}).status_code == 304
+    # A tag stored for the gzip body still validates the identity body of the same version
+    not_modified = get(client, "/large", **{"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert "Content-Encoding" not in not_modified.headers
+
+    cache.invalidate("large")
+    assert get(client, "/large", "gzip", **{"If-None-Match": etag}).status_code == 200
+
+
+def test_q_zero_excludes_a_coding():
+    _, client = make_client()
+    assert "Content-Encoding" not in get(client, "/large", "gzip;q=0").headers
+    assert "Content-Encoding" not in get(client, "/large", "gzip; q=0.0, br;q=0").headers
+    assert get(client, "/large", "br;q=0, gzip;q=0.5").headers["Content-Encoding"] == "gzip"
+
+
+def test_small_bodies_are_not_compressed():
+    _, client = make_client()
+    response = get(client, "/small", "gzip, br")
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == SMALL
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pytest
+
+from risk import Z_SCORES, RiskEngine, RollingCovariance
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "ADAUSDT"]
+
+
+def random_walk(bars=200, seed=1):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, [0.01, 0.015, 0.02, 0.005], size=(bars, len(SYMBOLS)))
+    # Correlate ETH with BTC so the off-diagonal terms matter
+    returns[:, 1] += 0.8 * returns[:, 0]
+    prices = 100.0 * np.exp(np.cumsum(returns, axis=0))
+    return prices, np.diff(np.log(prices), axis=0)
+
+
+def test_welford_matches_numpy_cov():
+    prices, returns = random_walk()
+    covariance = RollingCovariance(SYMBOLS, method="welford")
+    for row in prices:
+        covariance.update(row)
+    assert covariance.bars == len(returns)
+    np.testing.assert_allclose(covariance.cov, np.cov(returns, rowvar=False), rtol=1e-9, atol=1e-15)
+
+
+def test_step_does_not_modify_until_applied():
+    prices, _ = random_walk(bars=3)
+    covariance = RollingCovariance(SYMBOLS)
+    covariance.update(prices[0])
+    covariance.update(prices[1])
+    cov_before = covariance.cov.copy()
+    state = covariance.step(prices[2])
+    np.testing.assert_array_equal(covariance.cov, cov_before)
+    assert covariance.bars == 1
+    covariance.apply(state)
+    assert covariance.bars == 2
+    assert not np.array_equal(covariance.cov, cov_before)
+
+
+def full_var(engine):
+    exposure = engine.exposure
+    return Z_SCORES[engine.confidence] * math.sqrt(max(exposure @ engine.covariance.cov @ exposure, 0.0))
+
+
+def test_incremental_var_matches_full_recompute():
+    prices, _ = random_walk()
+    engine = RiskEngine(SYMBOLS)
+    rng = np.random.default_rng(2)
+    for row in prices:
+        engine.apply_bar(engine.prepare_bar(dict(zip(SYMBOLS, row))))
+        # Warm the cache, then move exposure with rank-one updates only
+        engine.value_at_risk()
+        for _ in range(3):
+            engine.add_exposure(SYMBOLS[rng.integers(len(SYMBOLS))], float(rng.normal(0, 1000)))
+        assert engine.value_at_risk() == pytest.approx(full_var(engine), rel=1e-9, abs=1e-9)
+
+
+def test_check_order_agrees_with_var_after_the_order():
+    prices, _ = random_walk()
+    engine = RiskEngine(SYMBOLS)
+    for row in prices:
+        engine.on_bar(dict(zip(SYMBOLS, row)))
+    engine.add_exposure("BTCUSDT", 5000)
+    engine.add_exposure("ETHUSDT", -2000)
+
+    engine.add_exposure("SOLUSDT", 3000)
+    var_after = full_var(engine)
+    engine.add_exposure("SOLUSDT", -3000)
+
+    assert engine.check_order("SOLUSDT", 3000, max_var=var_after * 1.001)[0]
+    allowed, reason = engine.check_order("SOLUSDT", 3000, max_var=var_after * 0.999)
+    assert not allowed and "VaR" in reason
+    allowed, reason = engine.check_order("SOLUSDT", 3000, max_gross_exposure=9999)
+    assert not allowed and "gross exposure" in reason
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+from scheduler import MAX_INTERVAL, MIN_INTERVAL, TIER_COLD, TIER_HOT, TIER_WARM, PollingScheduler
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "ADAUSDT"]
+
+
+def test_tiers_follow_volatility_and_subscriptions():
+    scheduler = PollingScheduler(SYMBOLS, base_interval=5, hot_volatility=0.01, warm_volatility=0.001, alpha=1.0)
+    for symbol, move in (("BTCUSDT", 1.02), ("ETHUSDT", 1.002), ("ADAUSDT", 1.0)):
+        scheduler.observe(symbol, 100.0, now=0.0)
+        scheduler.observe(symbol, 100.0 * move, now=5.0)
+    assert [scheduler.states[s].tier for s in SYMBOLS] == [TIER_HOT, TIER_WARM, TIER_COLD]
+
+    # Any watched symbol refreshes every base interval, however calm
+    scheduler.subscribe(["ADAUSDT"])
+    assert scheduler.states["ADAUSDT"].tier == TIER_HOT
+    scheduler.unsubscribe(["ADAUSDT"])
+    assert scheduler.states["ADAUSDT"].tier == TIER_COLD
+
+
+def test_due_batches_share_a_tier_deadline():
+    scheduler = PollingScheduler([f"S{i}" for i in range(250)], base_interval=5, batch_size=100)
+    batches = scheduler.due_batches(now=0.0)
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert scheduler.due_batches(now=4.9) == []
+    assert sum(len(batch) for batch in scheduler.due_batches(now=5.0)) == 250
+
+
+def test_periods_are_capped_by_max_period():
+    scheduler = PollingScheduler(SYMBOLS, base_interval=5)
+    assert [scheduler.period(tier) for tier in (TIER_HOT, TIER_WARM, TIER_COLD)] == [5, 20, 80]
+    scheduler = PollingScheduler(SYMBOLS, base_interval=5, max_period=60)
+    assert [scheduler.period(tier) for tier in (TIER_HOT, TIER_WARM, TIER_COLD)] == [5, 20, 60]
+    # max_period never makes a tier faster than the base interval
+    scheduler = PollingScheduler(SYMBOLS, base_interval=120, max_period=60)
+    assert scheduler.period(TIER_COLD) == 120
+
+
+def test_base_interval_is_clamped():
+    assert PollingScheduler(SYMBOLS, base_interval=0).base_interval == MIN_INTERVAL
+    scheduler = PollingScheduler(SYMBOLS)
+    scheduler.set_base_interval(10 ** 6)
+    assert scheduler.base_interval == MAX_INTERVAL
+    # observe must not divide by a zero interval
+    scheduler.set_base_interval(0)
+    scheduler.observe("BTCUSDT", 100.0, now=0.0)
+    scheduler.observe("BTCUSDT", 101.0, now=1.0)
+
+
+def test_setting_change_wakes_wait():
+    # Built outside any running loop, like the module-level scheduler in server.py
+    scheduler = PollingScheduler(SYMBOLS, base_interval=5)
+    scheduler.due_batches()
+
+    async def run():
+        waiter = asyncio.ensure_future(scheduler.wait())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        started = time.perf_counter()
+        scheduler.set_base_interval(1)
+        await waiter
+        return time.perf_counter() - started
+
+    assert asyncio.run(run()) < 0.5
+    # A wake-up that arrives before wait() is not lost either
+    scheduler.set_base_interval(2)
+    started = time.perf_counter()
+    asyncio.run(scheduler.wait())
+    assert time.perf_counter() - started < 0.5
@@ -0,0 +1,74 @@
+import pytest
+
+from trade_stats import MAX_TIMELINE_POINTS, TradeStats
+
+# Hour-aligned base time so hourly buckets line up with the epoch
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def test_late_fill_is_inserted_into_its_bucket():
+    stats = TradeStats()
+    stats.record("BTCUSDT", "BUY", "spot", 100.0, 1000.0, T0 + 300)
+    stats.record("BTCUSDT", "BUY", "spot", 110.0, 1100.0, T0 + 10)
+    stats.record("BTCUSDT", "BUY", "spot", 90.0, 900.0, T0 + 20)
+    stats.record("BTCUSDT", "BUY", "spot", 95.0, 950.0, T0 + 120)
+
+    table = stats.series[("BTCUSDT", "BUY", "spot")]
+    assert list(table["bucket"]) == [T0 // 60, T0 // 60 + 2, T0 // 60 + 5]
+    assert list(table["fills"]) == [2, 1, 1]
+    assert (table["low"][0], table["high"][0]) == (90.0, 110.0)
+    assert stats.query()["totals"]["fills"] == 4
+
+
+def test_start_and_end_are_aligned_to_buckets():
+    stats = TradeStats()
+    for minute in range(10):
+        stats.record("BTCUSDT", "BUY", "spot", 100.0, 100.0, T0 + minute * 60 + 30)
+    # [T0 + 90, T0 + 150) widens to whole buckets [T0 + 60, T0 + 180)
+    result = stats.query(start=T0 + 90, end=T0 + 150)
+    assert result["totals"]["fills"] == 2
+    assert [bucket["fills"] for bucket in result["buckets"]] == [1, 1]
+    # end is exclusive on a bucket boundary
+    assert stats.query(start=T0, end=T0 + 60)["totals"]["fills"] == 1
+
+
+def test_interval_is_rounded_up_and_coarsened():
+    stats = TradeStats()
+    for minute in range(120):
+        stats.record("BTCUSDT", "SELL", "spot", 100.0, 100.0, T0 + minute * 60)
+
+    hourly = stats.query(interval=3600)
+    assert hourly["interval"] == 3600
+    assert [bucket["fills"] for bucket in hourly["buckets"]] == [60, 60]
+    # 90 s rounds up to two buckets
+    assert stats.query(interval=90)["interval"] == 120
+
+    # A long range is widened so at most MAX_TIMELINE_POINTS buckets come back
+    wide = stats.query(start=T0, end=T0 + 60 * 60 * 24 * 30, interval=60)
+    assert wide["interval"] > 60
+    assert len(wide["buckets"]) <= MAX_TIMELINE_POINTS
+    assert sum(bucket["fills"] for bucket in wide["buckets"]) == 120
+
+
+def test_vwap_and_ratios_per_pair():
+    stats = TradeStats()
+    # BTC: 1 @ 100 and 3 @ 200 -> VWAP 700 / 4 = 175
+    stats.record("BTCUSDT", "BUY", "spot", 100.0, 100.0, T0)
+    stats.record("BTCUSDT", "SELL", "futures", 200.0, 600.0, T0 + 60)
+    stats.record("ETHUSDT", "BUY", "spot", 10.0, 50.0, T0)
+    stats.record("ETHUSDT", "HOLD", "spot", 10.0, 50.0, T0)
+
+    result = stats.query()
+    btc = result["pairs"]["BTCUSDT"]
+    assert btc["vwap"] == pytest.approx(175.0)
+    assert (btc["low"], btc["high"]) == (100.0, 200.0)
+    assert btc["buy_sell_ratio"] == pytest.approx(100 / 600)
+    assert result["pairs"]["ETHUSDT"]["fills"] == 1
+    # Mixed pairs: totals carry no price fields
+    assert "vwap" not in result["totals"] and "quantity" not in result["totals"]
+    assert result["totals"]["volume"] == pytest.approx(750.0)
+
+    one_pair = stats.query(pair="BTCUSDT", market_type="futures")
+    assert one_pair["totals"]["vwap"] == pytest.approx(200.0)
+    assert one_pair["buckets"][0]["vwap"] == pytest.approx(200.0)
+    assert stats.query(side="sell")["totals"]["sell_volume"] == pytest.approx(600.0)
@@ -0,0 +1,74 @@
+import pytest
+
+from ws_protocol import (
+    CHANGE_SCALE, INT32_RANGE, PRICE_SCALE, SymbolTable, decode_binary_frame, encode_binary_prices,
+)
+
+
+def price_update(**pairs):
+    return {"type": "price_update", "data": pairs, "update_interval": 5, "ai_signals": {"BTCUSDT": "BUY"}}
+
+
+def decode(frame, symbols):
+    names = decode_binary_frame(symbols.frame())["symbols"]
+    return decode_binary_frame(frame, names)
+
+
+def test_round_trip_scales_prices_and_keeps_trailer():
+    symbols = SymbolTable()
+    message = price_update(BTCUSDT={
+        "symbol": "BTC/USDT", "price": 43250.12345678, "change": -2.3456,
+        "volume": 1234567.8, "high24h": 44000.5, "low24h": 42000.25, "stale": True,
+    })
+    decoded = decode(encode_binary_prices(message, symbols), symbols)
+
+    pair = decoded["data"]["BTCUSDT"]
+    assert pair["symbol"] == "BTC/USDT"
+    assert pair["price"] == pytest.approx(43250.12345678, abs=1 / PRICE_SCALE)
+    assert pair["change"] == pytest.approx(-2.3456, abs=1 / CHANGE_SCALE)
+    # Volume is sent as a whole number
+    assert pair["volume"] == 1234568
+    assert pair["high24h"] == 44000.5 and pair["low24h"] == 42000.25
+    assert pair["stale"] is True
+    assert decoded["type"] == "price_update"
+    assert decoded["update_interval"] == 5
+    assert decoded["ai_signals"] == {"BTCUSDT": "BUY"}
+
+
+def test_missing_fields_and_empty_trailer():
+    symbols = SymbolTable()
+    frame = encode_binary_prices({"type": "price_update", "data": {"ETHUSDT": {"price": None}}}, symbols)
+    decoded = decode(frame, symbols)
+    assert decoded["data"]["ETHUSDT"]["price"] == 0
+    assert decoded["data"]["ETHUSDT"]["stale"] is False
+    assert set(decoded) == {"type", "data", "time"}
+
+
+def test_out_of_range_values_are_clamped_not_dropped():
+    symbols = SymbolTable()
+    message = price_update(
+        BTCUSDT={"price": 1.0, "change": 10 ** 9, "volume": -5, "high24h": float("inf"), "low24h": float("nan")},
+        ETHUSDT={"price": 2.0, "volume": 10 ** 30},
+    )
+    decoded = decode(encode_binary_prices(message, symbols), symbols)["data"]
+    assert decoded["BTCUSDT"]["change"] == INT32_RANGE[1] / CHANGE_SCALE
+    assert decoded["BTCUSDT"]["volume"] == 0
+    assert decoded["BTCUSDT"]["high24h"] == 0 and decoded["BTCUSDT"]["low24h"] == 0
+    assert decoded["ETHUSDT"]["volume"] == 2 ** 64 - 1
+    assert decoded["ETHUSDT"]["price"] == 2.0
+
+
+def test_symbol_table_versions_only_on_new_pairs():
+    symbols = SymbolTable()
+    encode_binary_prices(price_update(BTCUSDT={"price": 1.0}), symbols)
+    first = symbols.frame()
+    assert symbols.version == 1
+
+    encode_binary_prices(price_update(BTCUSDT={"price": 2.0}), symbols)
+    assert symbols.version == 1
+    assert symbols.frame() is first
+
+    encode_binary_prices(price_update(BTCUSDT={"price": 2.0}, ETHUSDT={"symbol": "ETH/USDT", "price": 3.0}), symbols)
+    assert symbols.version == 2
+    table = decode_binary_frame(symbols.frame())["symbols"]
+    assert table == {0: ("BTCUSDT", "BTCUSDT"), 1: ("ETHUSDT", "ETH/USDT")}